@@ -1,26 +1,652 @@
 """
 Async wrapper for tracker.gg BF-6 endpoints.
-• Cloudflare solved with cloudscraper
-• 30-second in-memory cache (bypass with fresh=True)
+• pooled aiohttp transport (keep-alive, per-host connection limits)
+• Cloudflare solved with cloudscraper in a bounded worker thread
+• bounded LRU cache with per-endpoint TTLs (bypass with fresh=True)
+• single-flight: concurrent misses for one key share one request
+• per-endpoint token buckets, Retry-After aware backoff, circuit breaker
+• profiles are stale-while-revalidate (see prefetch.py)
+• optional cross-process L2 cache + fetch leases (see shared.py)
+• priority scheduler: interactive → fan-out → background, with aging and
+  per-request deadlines (see request_class)
 """
 
 from __future__ import annotations
-import os, asyncio, typing as t, time, logging, cloudscraper, requests
+import os, json, random, asyncio, functools, typing as t, time, logging
+import contextlib, contextvars
+from email.utils import parsedate_to_datetime
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+import aiohttp
+import metrics
+from records import ProfileRecord
 
 log         = logging.getLogger("bf6bot.trn")
 BASE        = "https://api.tracker.gg/api/v2/bf6/standard"
 TRN_API_KEY = os.getenv("TRN_API_KEY", "")
 HEADERS     = {"TRN-Api-Key": TRN_API_KEY}
 
-_scraper = cloudscraper.create_scraper(
-    browser={"browser": "chrome", "platform": "windows", "desktop": True}
-)
-_scraper.cookies.set("cf_clearance", os.getenv("CF_CLEARANCE", ""))
-_scraper.cookies.set("__cf_bm",      os.getenv("CF_BM",       ""))
+@functools.cache
+def _scraper():
+    """cloudscraper session, built on first use – it is slow to import and
+    create, and most restarts never need it before the first request."""
+    import cloudscraper
+    s = cloudscraper.create_scraper(
+        browser={"browser": "chrome", "platform": "windows", "desktop": True}
+    )
+    s.cookies.set("cf_clearance", os.getenv("CF_CLEARANCE", ""))
+    s.cookies.set("__cf_bm",      os.getenv("CF_BM",       ""))
+    return s
 
-_CONCURRENCY = asyncio.Semaphore(4)
-_TTL         = 30          # seconds
-_CACHE: dict[str, tuple[float, dict]] = {}   # key → (timestamp, data)
+# ───────────────────────── transport ─────────────────────────────────────
+class TransportError(Exception):
+    """Upstream answered with an HTTP error status."""
+    def __init__(self, msg: str, status: int = 0):
+        super().__init__(msg)
+        self.status = status
+
+
+class Response(t.NamedTuple):
+    status:  int
+    headers: t.Mapping[str, str]
+    body:    bytes
+
+    def json(self) -> t.Any:
+        return json.loads(self.body)
+
+    def raise_for_status(self, url: str) -> None:
+        if self.status >= 400:
+            raise TransportError(f"HTTP {self.status} for {url}", self.status)
+
+
+class Transport(t.Protocol):
+    async def get(self, url: str, *, params: dict | None,
+                  headers: dict, timeout: float) -> Response: ...
+    async def solve(self, url: str, *, params: dict | None,
+                    headers: dict, timeout: float) -> Response: ...
+    async def close(self) -> None: ...
+
+
+class AiohttpTransport:
+    """
+    One pooled keep-alive `aiohttp` session for every request.
+    A 403 is retried through cloudscraper on a bounded worker pool, and the
+    clearance cookies it earns are copied back into the aiohttp jar.
+    """
+    def __init__(self, *, limit: int = 16, limit_per_host: int = 4,
+                 keepalive: float = 30.0, cf_workers: int = 1):
+        self._limit, self._per_host, self._keepalive = limit, limit_per_host, keepalive
+        self._session: aiohttp.ClientSession | None = None
+        self._cf_pool = ThreadPoolExecutor(max_workers=cf_workers,
+                                           thread_name_prefix="bf6-cf")
+
+    def _sess(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            conn = aiohttp.TCPConnector(limit=self._limit,
+                                        limit_per_host=self._per_host,
+                                        keepalive_timeout=self._keepalive,
+                                        ttl_dns_cache=300)
+            # same UA as the scraper – cf_clearance is bound to it
+            self._session = aiohttp.ClientSession(
+                connector=conn,
+                headers={"User-Agent": _scraper().headers["User-Agent"]},
+            )
+            self._adopt_cookies()
+        return self._session
+
+    def _adopt_cookies(self) -> None:
+        if self._session is None: return
+        self._session.cookie_jar.update_cookies(
+            {c.name: c.value for c in _scraper().cookies if c.value}
+        )
+
+    async def get(self, url, *, params=None, headers=None, timeout=15.0):
+        async with self._sess().get(
+            url, params=params, headers=headers,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as r:
+            return Response(r.status, r.headers, await r.read())
+
+    async def solve(self, url, *, params=None, headers=None, timeout=15.0):
+        import requests                      # loaded with cloudscraper
+        loop = asyncio.get_running_loop()
+        try:
+            r = await loop.run_in_executor(self._cf_pool, functools.partial(
+                _scraper().get, url, params=params, headers=headers,
+                timeout=timeout))
+        except requests.RequestException as e:
+            raise TransportError(str(e)) from e
+        self._adopt_cookies()
+        return Response(r.status_code, r.headers, r.content)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._cf_pool.shutdown(wait=False)
+
+
+_transport: Transport = AiohttpTransport()
+
+def set_transport(tr: Transport) -> None:
+    """Swap the HTTP layer (tests, benchmarks, alternative clients)."""
+    global _transport
+    _transport = tr
+
+async def close() -> None:
+    await _transport.close()
+
+_NET_ERRORS = (TransportError, aiohttp.ClientError, asyncio.TimeoutError,
+               ValueError)
+
+# ───────────────────────── rate limiting ─────────────────────────────────
+class TokenBucket:
+    """`rate` requests/s with bursts up to `burst`; `block()` pauses it."""
+    def __init__(self, rate: float, burst: float):
+        self.rate, self.burst = rate, burst
+        self.tokens  = burst
+        self.stamp   = time.monotonic()
+        self.blocked_until = 0.0
+        self.waits   = 0                     # acquisitions that had to sleep
+        self._waiting: set[Ticket] = set()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp  = now
+
+    async def acquire(self, tk: Ticket | None = None) -> None:
+        """Take a token.  A waiting `tk` of a more urgent class goes first;
+        DeadlineExceeded if `tk`'s deadline passes before one is free."""
+        waited = False
+        if tk is not None:
+            self._waiting.add(tk)
+        try:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                elif self.tokens >= 1 and not self._outranked(tk):
+                    self.tokens -= 1
+                    self.waits += waited
+                    return
+                else:
+                    # outranked with a token free: the other waiter is due
+                    delay = (1 - self.tokens if self.tokens < 1 else 0.5) \
+                            / self.rate
+                if tk is not None and (left := tk.left(now)) is not None:
+                    if left <= 0:
+                        metrics.incr(f"sched.expired.{CLASS_NAMES[tk.cls]}")
+                        raise DeadlineExceeded("deadline passed in rate limit")
+                    delay = min(delay, left)
+                waited = True
+                await asyncio.sleep(delay)
+        finally:
+            self._waiting.discard(tk)
+
+    def _outranked(self, tk: Ticket | None) -> bool:
+        # at most a scheduler's worth of waiters, so a scan is fine
+        return tk is not None and any(o.cls < tk.cls for o in self._waiting)
+
+    def block(self, secs: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + secs)
+
+    def observe(self, headers: t.Mapping[str, str]) -> None:
+        """Pause until the advertised reset once the window is exhausted."""
+        if headers.get("X-RateLimit-Remaining") != "0":
+            return
+        try:
+            reset = float(headers.get("X-RateLimit-Reset", ""))
+        except ValueError:
+            return
+        # epoch seconds or delta seconds – both appear in the wild
+        self.block(reset - time.time() if reset > 1e9 else reset)
+
+    def state(self) -> dict[str, float]:
+        self._refill(time.monotonic())
+        return dict(rate=self.rate, burst=self.burst,
+                    tokens=round(self.tokens, 2), waits=self.waits,
+                    blocked_for=round(max(0.0, self.blocked_until
+                                          - time.monotonic()), 1))
+
+
+class CircuitBreaker:
+    """
+    closed → open after `threshold` consecutive failed requests;
+    open   → half-open after `cooldown` s, letting a single probe through;
+    a successful probe closes it again, a failed one re-opens it.  A probe
+    that never reports back (cancelled, crashed) is replaced after another
+    `cooldown` s, so half-open can't wedge.
+    """
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0):
+        self.threshold, self.cooldown = threshold, cooldown
+        self.failures  = 0
+        self.opened_at = 0.0
+        self.state_    = "closed"
+        self.trips     = 0
+
+    def allow(self) -> bool:
+        if self.state_ == "closed":
+            return True
+        now = time.monotonic()
+        if now - self.opened_at >= self.cooldown:
+            # open: cooled down; half-open: the last probe went missing
+            self.state_, self.opened_at = "half-open", now
+            return True                      # this caller is the probe
+        return False
+
+    def success(self) -> None:
+        self.failures, self.state_ = 0, "closed"
+
+    def abandon(self) -> None:
+        """The probe ended without asking upstream – the next caller probes."""
+        if self.state_ == "half-open":
+            self.opened_at = time.monotonic() - self.cooldown
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.state_ == "half-open" or self.failures >= self.threshold:
+            if self.state_ != "open":
+                log.warning("[TRN] upstream unhealthy – circuit open %.0f s",
+                            self.cooldown)
+                self.trips += 1
+            self.state_, self.opened_at = "open", time.monotonic()
+
+    def state(self) -> dict[str, t.Any]:
+        return dict(state=self.state_, failures=self.failures, trips=self.trips)
+
+
+def _limit(kind: str, default: str) -> TokenBucket:
+    """TRN_RATE_<KIND>="rate/burst", e.g. TRN_RATE_PROFILE=2/5."""
+    rate, _, burst = os.getenv(f"TRN_RATE_{kind.upper()}", default).partition("/")
+    return TokenBucket(float(rate), float(burst or rate))
+
+_BUCKETS = {
+    "profile": _limit("profile", "2/5"),
+    "matches": _limit("matches", "1/3"),
+    "search":  _limit("search",  "1/3"),
+}
+_BREAKER  = CircuitBreaker()
+_ATTEMPTS = 3
+_RETRY    = {403, 429, 500, 502, 503, 504}
+
+def _backoff(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def _retry_after(headers: t.Mapping[str, str]) -> float | None:
+    v = headers.get("Retry-After")
+    if not v: return None
+    try:
+        return max(0.0, float(v))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(v).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+def budget(kind: str) -> float:
+    """Requests/s currently available for `kind` (0 while paused/open)."""
+    b = _BUCKETS.get(kind)
+    if b is None or _BREAKER.state_ == "open" \
+            or b.blocked_until > time.monotonic():
+        return 0.0
+    return b.rate
+
+def limiter_state() -> dict[str, dict]:
+    return {"breaker": _BREAKER.state(),
+            **{k: b.state() for k, b in _BUCKETS.items()}}
+
+# ───────────────────────── scheduling ────────────────────────────────────
+INTERACTIVE, FANOUT, BACKGROUND = 0, 1, 2    # most urgent first
+CLASS_NAMES = ("interactive", "fanout", "background")
+
+_CLASS:    contextvars.ContextVar[int] = \
+    contextvars.ContextVar("trn_class", default=BACKGROUND)
+_DEADLINE: contextvars.ContextVar[float | None] = \
+    contextvars.ContextVar("trn_deadline", default=None)
+
+
+@contextlib.contextmanager
+def request_class(cls: int, deadline: float | None = None):
+    """
+    Fetches made inside – and tasks created inside – queue as `cls`.  Past
+    `deadline` (time.monotonic()) queued fetches give up and answer with
+    cached data or None.  Without one, interactive classes keep the current
+    deadline and background work has none.
+    """
+    if deadline is None and cls != BACKGROUND:
+        deadline = _DEADLINE.get()
+    c, d = _CLASS.set(cls), _DEADLINE.set(deadline)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(d); _CLASS.reset(c)
+
+
+class DeadlineExceeded(TransportError):
+    """A queued request's deadline passed before it reached upstream."""
+
+
+class Ticket:
+    """One upstream request's place in line.  A more urgent caller joining
+    the request promotes it (see Scheduler.promote)."""
+    __slots__ = ("cls", "deadline", "since", "slot", "fut")
+
+    def __init__(self, cls: int, deadline: float | None):
+        self.cls, self.deadline = cls, deadline
+        self.since = time.monotonic()
+        self.slot  = cls                     # class whose slot it holds
+        self.fut: asyncio.Future | None = None
+
+    def left(self, now: float) -> float | None:
+        return None if self.deadline is None else self.deadline - now
+
+    @property
+    def queued(self) -> bool:
+        """Not holding, nor yet granted, a slot."""
+        return self.fut is None or not self.fut.done()
+
+
+class Scheduler:
+    """
+    `slots` concurrent upstream requests, handed out by class:
+    • interactive before fan-out before background; background work
+      never takes the last `reserve` slots, so a command always finds one
+    • aging: every `age` s waited counts as one class more urgent, so
+      background work can't starve under a steady interactive load
+    • FIFO within a class; requests past their deadline leave the queue
+      with DeadlineExceeded instead of taking a slot
+    """
+    def __init__(self, slots: int = 4, *, reserve: int = 1, age: float = 5.0):
+        self.slots, self.reserve, self.age = slots, reserve, age
+        self._q: list[deque[Ticket]] = [deque() for _ in CLASS_NAMES]
+        self.depth   = [0] * len(CLASS_NAMES)    # waiting, per class
+        self.running = [0] * len(CLASS_NAMES)
+        self.expired = 0
+
+    def _fits(self, cls: int) -> bool:
+        free = self.slots - sum(self.running)
+        return free > (self.reserve if cls == BACKGROUND else 0)
+
+    async def acquire(self, tk: Ticket) -> None:
+        """Wait for a slot; release(tk) once done with it."""
+        t0 = time.monotonic()
+        tk.fut = asyncio.get_running_loop().create_future()
+        self._q[tk.cls].append(tk)
+        self.depth[tk.cls] += 1
+        self._dispatch()
+        try:
+            while not tk.fut.done():
+                left = tk.left(time.monotonic())
+                if left is not None and left <= 0:
+                    self._expire(tk)
+                    break
+                try:
+                    # shield: a timeout must not cancel a slot being granted
+                    await asyncio.wait_for(asyncio.shield(tk.fut), left)
+                except asyncio.TimeoutError:
+                    pass                     # re-check: a joiner may extend it
+        except asyncio.CancelledError:
+            if not tk.fut.done():
+                tk.fut.cancel()
+                self.depth[tk.cls] -= 1
+            elif tk.fut.exception() is None:
+                self.release(tk)             # granted as we were cancelled
+            raise
+        tk.fut.result()                      # DeadlineExceeded
+        metrics.observe(f"queue.sched.{CLASS_NAMES[tk.cls]}",
+                        (time.monotonic() - t0) * 1000)
+
+    def release(self, tk: Ticket) -> None:
+        self.running[tk.slot] -= 1
+        self._dispatch()
+
+    def promote(self, tk: Ticket, cls: int, deadline: float | None) -> None:
+        """Another caller joined `tk`'s request: wait as long as the most
+        patient of them, at the most urgent class any of them has."""
+        tk.deadline = None if tk.deadline is None or deadline is None \
+                      else max(tk.deadline, deadline)
+        if cls >= tk.cls:
+            return
+        if tk.fut is not None and not tk.fut.done():   # still queued
+            self.depth[tk.cls] -= 1; self.depth[cls] += 1
+            self._q[cls].append(tk)          # old entry is skipped later
+            tk.cls = cls
+            self._dispatch()
+        else:
+            tk.cls = cls
+        metrics.incr("sched.promoted")
+
+    def _expire(self, tk: Ticket) -> None:
+        self.depth[tk.cls] -= 1
+        self.expired += 1
+        metrics.incr(f"sched.expired.{CLASS_NAMES[tk.cls]}")
+        tk.fut.set_exception(DeadlineExceeded("deadline passed in queue"))
+
+    def _dispatch(self) -> None:
+        while (tk := self._next()) is not None:
+            tk.slot = tk.cls
+            self.running[tk.slot] += 1
+            tk.fut.set_result(None)
+
+    def _next(self) -> Ticket | None:
+        now, best, rank = time.monotonic(), None, 0.0
+        for cls, q in enumerate(self._q):
+            while q:
+                head = q[0]
+                if head.fut.done() or head.cls != cls:   # cancelled / promoted
+                    q.popleft()
+                elif (left := head.left(now)) is not None and left <= 0:
+                    q.popleft(); self._expire(head)
+                else:
+                    break
+            if not q or not self._fits(cls):
+                continue
+            r = cls - (now - q[0].since) / self.age
+            if best is None or r < rank:
+                best, rank = cls, r
+        if best is None:
+            return None
+        self.depth[best] -= 1
+        return self._q[best].popleft()
+
+    def state(self) -> dict[str, t.Any]:
+        return dict(slots=self.slots, expired=self.expired,
+                    **{n: dict(waiting=self.depth[c], running=self.running[c])
+                       for c, n in enumerate(CLASS_NAMES)})
+
+
+_SCHED   = Scheduler(int(os.getenv("TRN_SLOTS", "4")))
+_TICKETS: dict[str, Ticket] = {}             # key → ticket of its request
+
+for _c, _n in enumerate(CLASS_NAMES):
+    metrics.gauge(f"sched.depth.{_n}",   lambda c=_c: _SCHED.depth[c])
+    metrics.gauge(f"sched.running.{_n}", lambda c=_c: _SCHED.running[c])
+
+def scheduler_state() -> dict[str, t.Any]:
+    return _SCHED.state()
+
+# ───────────────────────── cache ─────────────────────────────────────────
+_TTL         = 30          # seconds (profiles)
+TTLS         = {"profile": _TTL, "matches": 60, "search": 300}
+
+
+class _Entry:
+    __slots__ = ("data", "stored", "ttl", "size")
+
+    def __init__(self, data, stored: float, ttl: float, size: int):
+        self.data, self.stored, self.ttl, self.size = data, stored, ttl, size
+
+    def fresh(self, now: float) -> bool:
+        return now - self.stored < self.ttl
+
+
+class Cache:
+    """
+    LRU response cache bounded by entry count *and* payload bytes.
+    Every entry carries its own TTL so each endpoint can age differently.
+    """
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 32 << 20):
+        self.max_entries, self.max_bytes = max_entries, max_bytes
+        self._d: OrderedDict[str, _Entry] = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = self.coalesced = self.evictions = 0
+        self.stale = 0
+        self.reserved: t.Callable[[], int] = lambda: 0   # see reserve()
+        self.reserved_each = 0
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+    def __contains__(self, k: str) -> bool:
+        return k in self._d
+
+    def peek(self, k: str) -> _Entry | None:
+        """Entry for `k` regardless of age (stale-while-revalidate)."""
+        e = self._d.get(k)
+        if e is not None:
+            self._d.move_to_end(k)
+        return e
+
+    def get(self, k: str, now: float | None = None):
+        """Fresh data for `k` or None; a hit refreshes its LRU position."""
+        e = self._d.get(k)
+        if e is None or not e.fresh(time.time() if now is None else now):
+            return None
+        self._d.move_to_end(k)
+        self.hits += 1
+        return e.data
+
+    def put(self, k: str, data, *, ttl: float, size: int,
+            stored: float | None = None) -> None:
+        self.pop(k)
+        self._d[k] = _Entry(data, time.time() if stored is None else stored,
+                            ttl, size)
+        self.bytes += size
+        extra = self.reserved()
+        while self._d and (len(self._d) > self.max_entries + extra
+                           or self.bytes > self.max_bytes
+                                           + extra * self.reserved_each):
+            _, old = self._d.popitem(last=False)
+            self.bytes -= old.size
+            self.evictions += 1
+
+    def pop(self, k: str) -> None:
+        e = self._d.pop(k, None)
+        if e is not None:
+            self.bytes -= e.size
+
+    def clear(self) -> None:
+        self._d.clear(); self.bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        return dict(entries=len(self._d), bytes=self.bytes, hits=self.hits,
+                    misses=self.misses, coalesced=self.coalesced,
+                    stale=self.stale, evictions=self.evictions)
+
+
+_CACHE    = Cache(int(os.getenv("TRN_CACHE_ENTRIES", "2048")),
+                  int(float(os.getenv("TRN_CACHE_MB", "32")) * (1 << 20)))
+_INFLIGHT: dict[str, asyncio.Task] = {}      # key → shared upstream request
+_WAITING:  dict[asyncio.Task, int] = {}      # request → callers awaiting it
+
+def reserve(count: t.Callable[[], int], each: int = 4 << 10) -> None:
+    """Grow the cache by `count()` entries of ~`each` bytes on top of
+    TRN_CACHE_ENTRIES/MB – one per roster profile, so a big roster can't
+    evict its own profiles to make room for matches and searches."""
+    _CACHE.reserved, _CACHE.reserved_each = count, each
+
+def cache_stats() -> dict[str, int]:
+    return _CACHE.stats()
+
+def _hit_ratio() -> float:
+    total = _CACHE.hits + _CACHE.stale + _CACHE.misses
+    return round((_CACHE.hits + _CACHE.stale) / total, 3) if total else 0.0
+
+metrics.gauge("cache.hit_ratio", _hit_ratio)
+metrics.gauge("cache.entries",   lambda: len(_CACHE))
+metrics.gauge("cache.bytes",     lambda: _CACHE.bytes)
+metrics.gauge("cache.coalesced", lambda: _CACHE.coalesced)
+metrics.gauge("cache.evictions", lambda: _CACHE.evictions)
+metrics.gauge("breaker.open",    lambda: int(_BREAKER.state_ != "closed"))
+
+# called as fn(kind, tag, data) whenever fresh upstream data is stored;
+# shared=True listeners also hear about data another process fetched
+Listener   = t.Callable[[str, t.Any, t.Any], None]
+_LISTENERS: list[tuple[Listener, bool]] = []
+
+def add_listener(fn: Listener, *, shared: bool = False) -> None:
+    _LISTENERS.append((fn, shared))
+
+def _notify(kind: str, tag, data, *, shared: bool = False) -> None:
+    for fn, wants_shared in _LISTENERS:
+        if shared and not wants_shared:
+            continue
+        try:
+            fn(kind, tag, data)
+        except Exception:
+            log.exception("[TRN] listener %r failed", fn)
+
+
+# ───────────────────────── shared cache (multi-process) ──────────────────
+class SharedCache(t.Protocol):
+    """A cache several bot processes see – shared.py has the SQLite one."""
+    async def lookup(self, kind: str, tag,
+                     since: float) -> tuple[t.Any, float] | None: ...
+    async def lease(self, kind: str, tag) -> bool: ...
+
+_shared: SharedCache | None = None
+_LEASE_POLL = 0.25          # s between looks at the shared cache
+_LEASE_WAIT = 5.0           # s to wait on another process before fetching
+
+def set_shared(shared: SharedCache | None) -> None:
+    global _shared
+    _shared = shared
+
+
+async def _from_shared(cache_k: str, kind: str, tag):
+    """Data another process fetched, or None once this one should fetch."""
+    ttl = TTLS.get(kind, _TTL)
+    e = _CACHE.peek(cache_k)
+    since = max(time.time() - ttl, e.stored + 1 if e else 0)
+    deadline = time.monotonic() + _LEASE_WAIT
+    while True:
+        try:
+            hit = await _shared.lookup(kind, tag, since)
+            if hit is None and await _shared.lease(kind, tag):
+                return None
+        except Exception:
+            log.exception("[TRN] shared cache failed")
+            return None
+        if hit is not None:
+            data, stored = hit
+            _CACHE.put(cache_k, data, ttl=ttl, stored=stored,
+                       size=getattr(data, "nbytes", 1024))
+            metrics.incr(f"shared.hit.{kind}")
+            _notify(kind, tag, data, shared=True)
+            return data
+        if time.monotonic() > deadline:
+            return None
+        await asyncio.sleep(_LEASE_POLL)
+
+
+def peek(url: str, params: dict | None = None):
+    """Cached data for `url` whatever its age, or None – never fetches."""
+    e = _CACHE.peek(_key(url, params))
+    return None if e is None else e.data
+
+
+def stored_at(url: str, params: dict | None = None) -> float | None:
+    """When the cached data for `url` was fetched (epoch s), if cached."""
+    e = _CACHE.peek(_key(url, params))
+    return None if e is None else e.stored
+
+
+def prime(url: str, data, *, kind: str, stored: float, size: int,
+          params: dict | None = None) -> None:
+    """Seed the cache with persisted data; old entries just start stale."""
+    _CACHE.put(_key(url, params), data, ttl=TTLS.get(kind, _TTL),
+               size=size, stored=stored)
 
 
 def _key(url: str, params: dict | None) -> str:
@@ -30,32 +656,168 @@ def _key(url: str, params: dict | None) -> str:
     return f"{url}?{p}"
 
 
-async def _fetch(url: str, *, params: dict | None = None, fresh=False) -> dict | None:
-    """Return `payload["data"]` or None.  403 => solve Cloudflare once."""
+async def _fetch(url: str, *, params: dict | None = None, fresh=False,
+                 kind: str = "profile", swr=False, tag=None,
+                 project: t.Callable[[t.Any], t.Any] | None = None) -> t.Any:
+    """
+    Return `payload["data"]` or None.  403 => solve Cloudflare once (off-loop).
+    Concurrent callers for one key share a single upstream request.
+    swr=True answers a stale entry at once and revalidates in the background.
+    `tag` is handed to listeners so they know what was refreshed.
+    `project` turns the payload into what gets cached (see records.py).
+    """
     cache_k = _key(url, params)
-    now     = time.time()
 
-    if not fresh and cache_k in _CACHE:
-        ts, data = _CACHE[cache_k]
-        if now - ts < _TTL:
+    if not fresh:
+        if (data := _CACHE.get(cache_k)) is not None:
+            return data
+        if swr and (e := _CACHE.peek(cache_k)) is not None:
+            _CACHE.stale += 1
+            with request_class(BACKGROUND):  # nobody waits for this one
+                _flight(url, params, cache_k, kind, tag, project)
+            return e.data
+
+    task = _flight(url, params, cache_k, kind, tag, project)
+    _WAITING[task] = _WAITING.get(task, 0) + 1
+    try:
+        # shield: one impatient caller must not cancel everybody else's fetch
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if _WAITING[task] == 1 and _TICKETS.get(cache_k) \
+                and _TICKETS[cache_k].queued:
+            _drop_flight(cache_k, task)      # last waiter gone before upstream
+        raise
+    finally:
+        n = _WAITING.pop(task) - 1
+        if n:
+            _WAITING[task] = n
+
+
+def _flight(url: str, params: dict | None, cache_k: str,
+            kind: str, tag, project=None) -> asyncio.Task:
+    """The in-flight upstream request for `cache_k`, started if needed."""
+    task = _INFLIGHT.get(cache_k)
+    if task is not None:
+        _CACHE.coalesced += 1
+        _SCHED.promote(_TICKETS[cache_k], _CLASS.get(), _DEADLINE.get())
+        return task
+    _CACHE.misses += 1
+    tk = _TICKETS[cache_k] = Ticket(_CLASS.get(), _DEADLINE.get())
+    task = asyncio.ensure_future(_request(url, params, cache_k, kind, tag,
+                                          project, tk))
+    _INFLIGHT[cache_k] = task
+    task.add_done_callback(lambda _: _forget_flight(cache_k, task))
+    return task
+
+
+def _forget_flight(cache_k: str, task: asyncio.Task) -> None:
+    if _INFLIGHT.get(cache_k) is task:       # not a newer flight for the key
+        del _INFLIGHT[cache_k]
+        _TICKETS.pop(cache_k, None)
+
+
+def _drop_flight(cache_k: str, task: asyncio.Task) -> None:
+    """Cancel a flight nobody waits for; later callers start a new one."""
+    _forget_flight(cache_k, task)
+    task.cancel()
+    metrics.incr("sched.cancelled")
+
+
+async def _request(url: str, params: dict | None, cache_k: str,
+                   kind: str, tag, project=None,
+                   tk: Ticket | None = None) -> t.Any:
+    """
+    Scheduled, rate-limited upstream GET with retries.  While the circuit is
+    open, once every attempt has failed, or once `tk`'s deadline passes in
+    the queue, the last cached (stale) data is returned.
+    """
+    if _shared is not None and tag is not None:
+        if (data := await _from_shared(cache_k, kind, tag)) is not None:
             return data
+    if not _BREAKER.allow():
+        return _stale(cache_k)
+    probe = _BREAKER.state_ == "half-open"
+    try:
+        return await _attempts(url, params, cache_k, kind, tag, project,
+                               tk or Ticket(_CLASS.get(), _DEADLINE.get()))
+    finally:
+        if probe and _BREAKER.state_ == "half-open":
+            _BREAKER.abandon()               # gave up without an answer
 
-    async with _CONCURRENCY:
-        for attempt in (1, 2):
+
+async def _attempts(url: str, params: dict | None, cache_k: str,
+                    kind: str, tag, project, tk: Ticket) -> t.Any:
+    bucket = _BUCKETS.get(kind) or _BUCKETS["profile"]
+    for attempt in range(1, _ATTEMPTS + 1):
+        try:
+            # slot first: only slot holders compete for the bucket's tokens
+            await _SCHED.acquire(tk)
             try:
-                r = _scraper.get(url, params=params, headers=HEADERS, timeout=15)
-                if r.status_code == 403 and attempt == 1:
+                with metrics.timed(f"queue.ratelimit.{kind}"):
+                    await bucket.acquire(tk)
+                t1 = time.perf_counter()
+                r = await _transport.get(url, params=params, headers=HEADERS,
+                                         timeout=15)
+                if r.status == 403 and attempt == 1:
                     log.warning("[TRN] 403 → solving CF challenge %s", url)
-                    _scraper.solve_cloudflare(url)
-                    continue
-                r.raise_for_status()
-                data = r.json()["data"]
-                _CACHE[cache_k] = (now, data)
-                return data
-            except requests.RequestException as e:
-                log.warning("[TRN] %s (attempt %s/2)", e, attempt)
+                    metrics.incr("upstream.cf_solve")
+                    r = await _transport.solve(url, params=params,
+                                               headers=HEADERS, timeout=15)
+                metrics.observe(f"upstream.{kind}",
+                                (time.perf_counter() - t1) * 1000)
+            finally:
+                _SCHED.release(tk)
+            metrics.incr(f"upstream.status.{r.status}")
+            bucket.observe(r.headers)
+            r.raise_for_status(url)
+            payload = r.json()
+            if not isinstance(payload, dict) or "data" not in payload:
+                raise ValueError(f"no data in response for {url}")
+            data = payload["data"]
+        except DeadlineExceeded:
+            return _stale(cache_k)           # nobody is waiting any more
+        except _NET_ERRORS as e:
+            status = getattr(e, "status", 0)
+            log.warning("[TRN] %s (attempt %s/%s)", e, attempt, _ATTEMPTS)
+            metrics.incr(f"upstream.error.{kind}")
+            if status and status not in _RETRY:
+                _BREAKER.success()           # upstream is fine, request isn't
+                return None
+            delay = (_retry_after(r.headers) if status else None) \
+                    or _backoff(attempt)
+            if status == 429:
+                bucket.block(delay)
+            elif attempt < _ATTEMPTS:
+                if (left := tk.left(time.monotonic())) is not None \
+                        and left < delay:
+                    break                    # would outlive its deadline
+                await asyncio.sleep(delay)
+            continue
+
+        _BREAKER.success()
+        size = len(r.body)
+        if project is not None:
+            try:
+                data = project(data)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                log.warning("[TRN] unexpected payload shape %s: %r", url, e)
+                return None
+            size = getattr(data, "nbytes", size)
+        _CACHE.put(cache_k, data, ttl=TTLS.get(kind, _TTL), size=size)
+        _notify(kind, tag, data)
+        return data
+
+    _BREAKER.failure()
+    return _stale(cache_k)
+
+
+def _stale(cache_k: str):
+    e = _CACHE.peek(cache_k)
+    if e is None:
         return None
-    
+    _CACHE.stale += 1
+    return e.data
+
 async def _normalise_search(data: dict | list) -> list[dict]:
     if data is None:
         return []
@@ -64,23 +826,32 @@ async def _normalise_search(data: dict | list) -> list[dict]:
     return data.get("matches", [])
 
 
+def profile_url(platform: str, user_id: str) -> str:
+    return f"{BASE}/profile/{platform}/{user_id}"
+
+
 # ──────────────────────────────────────────────────────────────────────────
 class TrnClient:
     async def __aenter__(self): return self
     async def __aexit__(self, *_): return False
 
-    # keep the `fresh` kwarg so main.py doesn’t have to change
+    # keep the `fresh` kwarg so main.py doesn’t have to change;
+    # otherwise a stale profile is served while it revalidates
     async def player_profile(
         self, platform: str, user_id: str, *, fresh: bool = False
-    ) -> dict | None:
-        return await _fetch(f"{BASE}/profile/{platform}/{user_id}", fresh=fresh)
+    ) -> ProfileRecord | None:
+        return await _fetch(profile_url(platform, user_id),
+                            fresh=fresh, kind="profile", swr=True,
+                            tag=(platform, user_id),
+                            project=ProfileRecord.from_payload)
 
     async def recent_matches(
-        self, platform: str, user_id: str, limit: int = 5
+        self, platform: str, user_id: str, limit: int = 5, page: int = 1
     ) -> list[dict]:
         data = await _fetch(
             f"{BASE}/matches/{platform}/{user_id}",
-            params={"page": 1, "limit": limit}
+            params={"page": page, "limit": limit}, kind="matches",
+            tag=(platform, user_id),
         )
 
         # ── normalise shape ───────────────────────────────
@@ -92,11 +863,17 @@ class TrnClient:
 
         return data.get("matches", [])
 
-    async def search_players(self, platform: str, query: str) -> list[dict]:
+    async def search_players(self, platform: str,
+                             query: str) -> list[dict] | None:
+        """Matches ([] = nobody by that name), or None if the search failed
+        – only an empty list is a reason to stop looking."""
         data = await _fetch(
             f"{BASE}/search",
-            params=dict(platform=platform, query=query, autocomplete="true")
+            params=dict(platform=platform, query=query, autocomplete="true"),
+            kind="search",
         )
+        if data is None:
+            return None
         return await _normalise_search(data)
 
         # legacy: bare list ▸ wrap it
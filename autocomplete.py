@@ -0,0 +1,103 @@
+"""
+Ranked roster-name lookup for autocomplete.
+• prefix hits come from a sorted list via bisection – O(log n + k)
+• substring hits intersect trigram posting lists; when nothing matches,
+  typo-tolerant hits are scored on the rarest shared grams
+• names are lower-cased once on insert, never per keystroke
+"""
+
+from __future__ import annotations
+import bisect, heapq, typing as t
+from collections import Counter
+
+MAX_CHOICES = 20            # Discord limit is 25
+_MAX_SCAN   = 2000          # posting entries inspected per fuzzy query
+
+
+def _grams(s: str) -> set[str]:
+    s = f" {s} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class NameIndex:
+    def __init__(self, names: t.Iterable[str] = ()):
+        self._sorted:  list[str] = []             # lower-cased
+        self._display: dict[str, str] = {}        # lower → shown name
+        self._refs:    Counter[str] = Counter()   # roster entries per name
+        self._grams:   dict[str, set[str]] = {}   # trigram → lower names
+        for n in names:
+            self.add(n)
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._display
+
+    def add(self, name: str) -> None:
+        low = name.lower()
+        self._refs[low] += 1
+        if self._refs[low] > 1:
+            return
+        self._display[low] = name
+        bisect.insort(self._sorted, low)
+        for g in _grams(low):
+            self._grams.setdefault(g, set()).add(low)
+
+    def remove(self, name: str) -> None:
+        low = name.lower()
+        if self._refs[low] <= 0:
+            return
+        self._refs[low] -= 1
+        if self._refs[low]:
+            return
+        del self._refs[low], self._display[low]
+        del self._sorted[bisect.bisect_left(self._sorted, low)]
+        for g in _grams(low):
+            post = self._grams.get(g)
+            if post is not None:
+                post.discard(low)
+                if not post: del self._grams[g]
+
+    def search(self, cur: str, k: int = MAX_CHOICES) -> list[str]:
+        """Best `k` names: prefix, then substring; typo-tolerant if none."""
+        q = cur.lower().strip()
+        if not q:
+            return [self._display[n] for n in self._sorted[:k]]
+
+        out: list[str] = []
+        i = bisect.bisect_left(self._sorted, q)
+        while i < len(self._sorted) and len(out) < k \
+                and self._sorted[i].startswith(q):
+            out.append(self._sorted[i]); i += 1
+        if len(out) < k and len(q) >= 3:
+            out += self._infix(q, k - len(out), set(out))
+        return [self._display[n] for n in out]
+
+    def _infix(self, q: str, k: int, skip: set[str]) -> list[str]:
+        # substring: every inner trigram of q must be present
+        inner = [self._grams.get(q[i:i + 3], set()) for i in range(len(q) - 2)]
+        inner.sort(key=len)
+        found: list[str] = []
+        if inner[0]:
+            common = inner[0].intersection(*inner[1:])
+            found = sorted((n for n in common if q in n and n not in skip),
+                           key=lambda n: (len(n), n))[:k]
+        if not found and not skip:           # typo tolerance only as a fallback
+            found = self._fuzzy(q, k)
+        return found
+
+    def _fuzzy(self, q: str, k: int) -> list[str]:
+        qg = _grams(q)
+        posts = sorted((self._grams.get(g, ()) for g in qg), key=len)
+        hits: Counter[str] = Counter()
+        scanned = 0
+        for post in posts:                   # rarest grams carry most signal
+            if scanned >= _MAX_SCAN: break
+            hits.update(post)
+            scanned += len(post)
+        need = max(2, len(qg) // 2)          # at least half the grams shared
+        return [r[-1] for r in heapq.nsmallest(k, (
+            (-c, len(n), n) for n, c in hits.items()
+            if c >= need
+        ))]
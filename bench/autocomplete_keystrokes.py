@@ -0,0 +1,64 @@
+"""
+Autocomplete micro-benchmark: NameIndex vs. the old linear `_choices` scan.
+
+    python bench/autocomplete_keystrokes.py --names 50000
+
+Simulates typing each query one keystroke at a time and reports the mean
+and worst per-keystroke latency; Discord gives autocomplete 3 s in total.
+"""
+from __future__ import annotations
+import os, sys, time, random, string, argparse, itertools
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from autocomplete import NameIndex
+
+
+def legacy(seq: list[str], cur: str) -> list[str]:
+    cur = cur.lower()
+    return list(itertools.islice((s for s in seq if cur in s.lower()), 20))
+
+
+def _names(n: int, rng: random.Random) -> list[str]:
+    alpha = string.ascii_letters + string.digits + "_"
+    return [f"{rng.choice(['', 'xX', 'The', 'Sgt'])}"
+            f"{''.join(rng.choices(alpha, k=rng.randint(4, 12)))}"
+            for _ in range(n)]
+
+
+def _time(fn, queries: list[str]) -> tuple[float, float]:
+    worst = total = 0.0
+    for q in queries:
+        for j in range(1, len(q) + 1):       # one call per keystroke
+            t0 = time.perf_counter()
+            fn(q[:j])
+            dt = time.perf_counter() - t0
+            total += dt; worst = max(worst, dt)
+    keys = sum(len(q) for q in queries)
+    return total / keys, worst
+
+
+def main(n: int, n_queries: int) -> None:
+    rng   = random.Random(6)
+    names = _names(n, rng)
+    t0 = time.perf_counter()
+    idx = NameIndex(names)
+    build = time.perf_counter() - t0
+
+    queries = [rng.choice(names) for _ in range(n_queries)]
+    queries += [q[2:-1] for q in queries]                    # mid-word
+    queries += [q[:3] + "z" + q[4:] for q in queries[:n_queries]]  # typo
+
+    for label, fn in (("legacy scan", lambda c: legacy(names, c)),
+                      ("NameIndex",   idx.search)):
+        mean, worst = _time(fn, queries)
+        print(f"{label:12}: mean {mean*1e6:8.1f} µs  worst {worst*1e3:7.2f} ms"
+              f"  per keystroke ({n:,} names)")
+    print(f"index build : {build*1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--names",   type=int, default=50_000)
+    ap.add_argument("--queries", type=int, default=50)
+    a = ap.parse_args()
+    main(a.names, a.queries)
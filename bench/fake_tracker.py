@@ -0,0 +1,160 @@
+"""
+Local tracker.gg stand-in for benchmarks.
+
+    python bench/fake_tracker.py --port 8085 --latency 0.08 --error-rate 0.01
+
+Serves the three BF6 endpoints the bot uses with deterministic, realistically
+sized payloads (overview + weapon/vehicle segments, like the real API).
+Latency, 5xx, 403 and 429 rates are configurable.  `start()` runs it on a
+daemon thread with its own loop, so a blocked bot loop cannot stall it.
+"""
+from __future__ import annotations
+import time, zlib, random, asyncio, argparse, threading, dataclasses, \
+       datetime as dt
+from aiohttp import web
+
+PREFIX = "/api/v2/bf6/standard"
+
+_OVERVIEW = {
+    "careerPlayerRank": ("Rank", 1, 100), "score": ("Score", 1e4, 5e7),
+    "matchesPlayed": ("Matches", 10, 5000), "matchesWon": ("Wins", 5, 2500),
+    "matchesLost": ("Losses", 5, 2500), "wlPercentage": ("Win %", 30, 70),
+    "timePlayed": ("Time Played", 3600, 2e6), "kills": ("Kills", 100, 2e5),
+    "assists": ("Assists", 50, 5e4), "deaths": ("Deaths", 100, 2e5),
+    "headshots": ("Headshots", 10, 5e4), "kdRatio": ("K/D", .3, 4),
+    "kdaRatio": ("KDA", .5, 5), "scorePerMinute": ("Score/Min", 100, 900),
+    "killsPerMinute": ("Kills/Min", .2, 2), "damagePerMinute": ("Dmg/Min", 50, 600),
+    "headshotPercentage": ("HS %", 5, 40),
+}
+_EXTRA_SEGMENTS = 40                 # weapons, vehicles, gadgets, maps …
+
+
+@dataclasses.dataclass
+class Config:
+    latency:    float = 0.05         # seconds, ±50 % jitter
+    error_rate: float = 0.0          # HTTP 500
+    cf_rate:    float = 0.0          # HTTP 403 (Cloudflare challenge)
+    limit_rate: float = 0.0          # HTTP 429 with Retry-After
+    requests:   int   = 0
+
+
+def _stat(rng: random.Random, name: str, lo: float, hi: float) -> dict:
+    v = rng.uniform(lo, hi)
+    return {"rank": None, "percentile": round(rng.uniform(0, 100), 1),
+            "displayName": name, "displayCategory": "General",
+            "category": "general", "metadata": {}, "value": v,
+            "displayValue": f"{v:,.2f}", "displayType": "Number"}
+
+
+def profile(platform: str, uid: str) -> dict:
+    rng = random.Random(f"{platform}/{uid}")
+    stats = {k: _stat(rng, *spec) for k, spec in _OVERVIEW.items()}
+    stats["careerPlayerRank"]["metadata"] = {
+        "imageUrl": f"https://trackercdn.com/cdn/bf6/ranks/{rng.randint(1, 99)}.png"}
+    segs = [{"type": "overview", "attributes": {}, "metadata": {"name": "Lifetime"},
+             "expiryDate": "2030-01-01T00:00:00+00:00", "stats": stats}]
+    for n in range(_EXTRA_SEGMENTS):
+        segs.append({"type": "weapon", "attributes": {"key": f"w{n}"},
+                     "metadata": {"name": f"Weapon {n}",
+                                  "imageUrl": f"https://trackercdn.com/w{n}.png"},
+                     "expiryDate": "2030-01-01T00:00:00+00:00",
+                     "stats": {k: _stat(rng, k, 0, 1e4) for k in
+                               ("kills", "shotsFired", "shotsHit", "accuracy",
+                                "headshots", "timePlayed", "damage", "kpm")}})
+    return {"platformInfo": {"platformSlug": platform, "platformUserId": uid,
+                             "platformUserHandle": f"player{uid}",
+                             "avatarUrl": f"https://avatars.example/{uid}.png"},
+            "userInfo": {"userId": None, "isPremium": False, "isVerified": False,
+                         "countryCode": rng.choice(["NZ", "AU", "US", "GB", "DE"]),
+                         "socialAccounts": []},
+            "metadata": {"lastUpdated": {"value": "2025-10-10T00:00:00Z"}},
+            "segments": segs, "availableSegments": [], "expiryDate": "2030-01-01"}
+
+
+def matches(platform: str, uid: str, limit: int, clock: float) -> dict:
+    """Newest first; a new match appears every ten minutes of wall clock."""
+    rng = random.Random(f"{platform}/{uid}/m")
+    newest = int(clock // 600)
+    out = []
+    for n in range(newest, newest - limit, -1):
+        ts = dt.datetime.fromtimestamp(n * 600, dt.timezone.utc).isoformat()
+        k, d = rng.randint(0, 40), rng.randint(1, 30)
+        out.append({"attributes": {"id": f"{uid}-{n}", "mapKey": "m"},
+                    "metadata": {"timestamp": ts, "mapName": "Cairo"},
+                    "segments": [{"type": "overview", "metadata": {}, "stats": {
+                        "kills":   {"value": k, "displayValue": str(k)},
+                        "deaths":  {"value": d, "displayValue": str(d)},
+                        "kdRatio": {"value": k / d, "displayValue": f"{k/d:.2f}"},
+                    }}]})
+    return {"matches": out}
+
+
+def app(cfg: Config) -> web.Application:
+    rng = random.Random(11)
+
+    async def gate() -> web.Response | None:
+        cfg.requests += 1
+        await asyncio.sleep(cfg.latency * rng.uniform(.5, 1.5))
+        x = rng.random()
+        if x < cfg.cf_rate:
+            return web.Response(status=403, text="<html>Just a moment…</html>")
+        if x < cfg.cf_rate + cfg.limit_rate:
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        if x < cfg.cf_rate + cfg.limit_rate + cfg.error_rate:
+            return web.Response(status=500)
+        return None
+
+    async def h_profile(r: web.Request):
+        return await gate() or web.json_response(
+            {"data": profile(r.match_info["platform"], r.match_info["uid"])})
+
+    async def h_matches(r: web.Request):
+        limit = int(r.query.get("limit", 5))
+        return await gate() or web.json_response({"data": matches(
+            r.match_info["platform"], r.match_info["uid"], limit, time.time())})
+
+    async def h_search(r: web.Request):
+        q = r.query.get("query", "")
+        hit = {"platformUserHandle": q, "platformSlug": r.query.get("platform"),
+               "titleUserId": str(zlib.crc32(q.encode())), "status": None,
+               "additionalParameters": {"countryCode": "NZ"}}
+        return await gate() or web.json_response({"data": {"matches": [hit]}})
+
+    a = web.Application()
+    a.router.add_get(PREFIX + "/profile/{platform}/{uid}", h_profile)
+    a.router.add_get(PREFIX + "/matches/{platform}/{uid}", h_matches)
+    a.router.add_get(PREFIX + "/search", h_search)
+    return a
+
+
+def start(cfg: Config, port: int = 0) -> str:
+    """Run on a daemon thread; returns the BASE url for api_handler."""
+    ready: list[str] = []
+    up = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(app(cfg), access_log=None)
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", port)
+        loop.run_until_complete(site.start())
+        real = site._server.sockets[0].getsockname()[1]
+        ready.append(f"http://127.0.0.1:{real}{PREFIX}")
+        up.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True, name="fake-tracker").start()
+    up.wait()
+    return ready[0]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8085)
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--cf-rate", type=float, default=0.0)
+    ap.add_argument("--limit-rate", type=float, default=0.0)
+    a = ap.parse_args()
+    cfg = Config(a.latency, a.error_rate, a.cf_rate, a.limit_rate)
+    web.run_app(app(cfg), host="127.0.0.1", port=a.port)
@@ -0,0 +1,108 @@
+"""
+Shared pieces for bot-level benchmarks.
+• FakeInteraction – just enough of `discord.Interaction` for the handlers
+• load_bot()      – imports main.py against a generated roster, a temp
+                    SQLite store and the fake tracker
+• summary()       – throughput and latency percentiles
+"""
+from __future__ import annotations
+import os, sys, json, time, asyncio, logging, datetime as dt
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+class _Perms:
+    manage_guild = administrator = True
+
+
+class _User:
+    def __init__(self, uid: int):
+        self.id, self.guild_permissions = uid, _Perms()
+
+
+class _Response:
+    def __init__(self, owner: "FakeInteraction"):
+        self._owner, self._done = owner, False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **_):
+        await asyncio.sleep(0.005)           # Discord round-trip, roughly
+        self._done = True
+
+    async def send_message(self, *args, **kwargs):
+        self._done = True
+        self._owner._record(args, kwargs)
+
+
+class _Followup:
+    def __init__(self, owner: "FakeInteraction"):
+        self._owner = owner
+
+    async def send(self, *args, **kwargs):
+        self._owner._record(args, kwargs)
+
+
+class FakeInteraction:
+    def __init__(self, uid: int = 1, guild_id: int = 1):
+        self.id         = id(self)
+        self.user       = _User(uid)
+        self.guild_id   = guild_id
+        self.created_at = dt.datetime.now(dt.timezone.utc)
+        self.response   = _Response(self)
+        self.followup   = _Followup(self)
+        self.sent: list[tuple[tuple, dict]] = []
+        self.replied    = asyncio.Event()
+
+    def _record(self, args, kwargs) -> None:
+        self.sent.append((args, kwargs))
+        self.replied.set()
+
+
+def write_roster(path: str, n: int) -> list[dict]:
+    players = [{"name": f"player{k}", "platform": "steam", "userId": str(k)}
+               for k in range(n)]
+    with open(path, "w", encoding="utf8") as f:
+        json.dump(players, f)
+    return players
+
+
+def load_bot(roster: int, base: str, workdir: str):
+    """Import main.py with `roster` players, pointed at the fake tracker."""
+    os.environ.setdefault("DISCORD_BOT_TOKEN", "bench")
+    os.environ["BF6_DB"] = os.path.join(workdir, "bf6.sqlite3")
+    for kind in ("PROFILE", "MATCHES", "SEARCH"):     # measure the bot, not
+        os.environ.setdefault(f"TRN_RATE_{kind}", "100000/100000")  # limits
+    write_roster(os.path.join(workdir, "players.json"), roster)
+    os.chdir(workdir)
+    import main
+    main.api_handler.BASE = base
+    logging.getLogger().setLevel(logging.WARNING)
+    return main
+
+
+def pct(xs: list[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+
+async def drive(op, n: int, concurrency: int) -> tuple[float, list[float]]:
+    """Run `op(k)` n times, `concurrency` at a time → (wall s, latencies s)."""
+    slots = asyncio.Semaphore(concurrency)
+    lat: list[float] = []
+
+    async def one(k: int):
+        async with slots:
+            t0 = time.perf_counter()
+            await op(k)
+            lat.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[one(k) for k in range(n)])
+    return time.perf_counter() - t0, lat
+
+
+def summary(label: str, wall: float, lat: list[float]) -> str:
+    return (f"{label:<20} {len(lat):>6} ops {len(lat)/wall:>9.1f}/s   "
+            f"p50 {pct(lat, .5)*1000:7.2f}  p95 {pct(lat, .95)*1000:7.2f}  "
+            f"p99 {pct(lat, .99)*1000:7.2f} ms")
@@ -0,0 +1,88 @@
+"""
+Offline load test of the bot's hot paths against the fake tracker.gg.
+
+    python bench/loadtest.py                       # rosters of 10, 1k, 10k
+    python bench/loadtest.py --sizes 1000 --latency 0.05 --error-rate 0.02
+
+Each roster size runs in a fresh interpreter (main.py keeps module state).
+Scenarios drive the real command callbacks with simulated interactions:
+a cold leaderboard, then concurrent leaderboard / player / recent calls, a
+burst of identical player commands and autocomplete keystrokes.  Reports throughput and p50/p95/p99 latency.
+"""
+from __future__ import annotations
+import os, sys, random, asyncio, argparse, tempfile, subprocess, time
+
+sys.path.insert(0, os.path.dirname(__file__))
+import fake_tracker
+from harness import FakeInteraction, load_bot, drive, summary
+
+
+async def scenarios(main, cfg: fake_tracker.Config, roster: int,
+                    ops: int, concurrency: int) -> None:
+    from discord import app_commands
+    rng   = random.Random(1)
+    stats = [app_commands.Choice(name=v[1], value=k)
+             for k, v in main.STATMAP.items()]
+    name  = lambda: f"player{rng.randrange(roster)}"
+
+    async def leaderboard(_):
+        await main.bf6_leaderboard.callback(FakeInteraction(),
+                                            stat=rng.choice(stats))
+    async def player(_):
+        await main.bf6_player.callback(FakeInteraction(), name=name())
+    async def recent(_):
+        await main.bf6_recent.callback(FakeInteraction(), name=name(),
+                                       count=rng.randint(1, 10))
+    async def burst(_):                      # everybody asks the same thing
+        await main.bf6_player.callback(FakeInteraction(), name="player0")
+    async def autocomplete(_):
+        q = name()
+        await main.ac_player(FakeInteraction(), q[:rng.randint(1, len(q))])
+
+    print(f"── roster {roster:,} ─ fake latency {cfg.latency*1000:.0f} ms, "
+          f"5xx {cfg.error_rate:.0%}, 403 {cfg.cf_rate:.0%}, "
+          f"429 {cfg.limit_rate:.0%}")
+    await main.setup_hook()
+    wall, lat = await drive(leaderboard, 1, 1)
+    print(summary("leaderboard (cold)", wall, lat))
+    for label, op in (("leaderboard", leaderboard), ("player", player),
+                      ("recent", recent), ("burst (one player)", burst),
+                      ("autocomplete", autocomplete)):
+        wall, lat = await drive(op, ops, concurrency)
+        print(summary(label, wall, lat))
+    print(f"upstream requests: {cfg.requests:,}")
+    await main.api_handler.close()
+    await main.ROSTER.close(); await main.STORE.close()
+
+
+def child(a) -> None:
+    cfg  = fake_tracker.Config(a.latency, a.error_rate, a.cf_rate, a.limit_rate)
+    base = fake_tracker.start(cfg)
+    with tempfile.TemporaryDirectory() as d:
+        main = load_bot(a.roster, base, d)
+        asyncio.run(scenarios(main, cfg, a.roster, a.ops, a.concurrency))
+        os.chdir(os.path.dirname(d))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10,1000,10000")
+    ap.add_argument("--roster", type=int, help=argparse.SUPPRESS)
+    ap.add_argument("--ops", type=int, default=500, help="ops per scenario")
+    ap.add_argument("--concurrency", type=int, default=20)
+    ap.add_argument("--latency", type=float, default=0.01)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--cf-rate", type=float, default=0.0)
+    ap.add_argument("--limit-rate", type=float, default=0.0)
+    a = ap.parse_args()
+    if a.roster is not None:
+        child(a)
+    else:
+        passthru = [f"--ops={a.ops}", f"--concurrency={a.concurrency}",
+                    f"--latency={a.latency}", f"--error-rate={a.error_rate}",
+                    f"--cf-rate={a.cf_rate}", f"--limit-rate={a.limit_rate}"]
+        for n in a.sizes.split(","):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, __file__, "--roster", n, *passthru],
+                           check=True)
+            print(f"   ({time.perf_counter() - t0:.1f} s)\n")
@@ -0,0 +1,60 @@
+"""
+Interactive latency while a big background backlog is queued upstream.
+
+    python bench/priority.py                 # 2k background fetches
+    python bench/priority.py --fifo          # every request in one class
+
+A cold roster's profiles are fetched in the background (as the resolver,
+/bf6 refresh or an import would), then /bf6 player commands for players
+nobody fetched yet arrive one after another.  With the scheduler they take
+the next free slot; with --fifo they queue behind the whole backlog, as
+they did behind the old single semaphore.
+"""
+from __future__ import annotations
+import os, sys, time, asyncio, argparse, tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+import fake_tracker
+from harness import FakeInteraction, load_bot, pct
+
+
+async def run(main, a) -> None:
+    api = main.api_handler
+    if a.fifo:                               # one class, one queue
+        api.INTERACTIVE = api.FANOUT = api.BACKGROUND
+        api._SCHED.reserve = 0
+    await main.setup_hook()
+    await main.READY.wait()
+    with api.request_class(api.BACKGROUND):
+        backlog = asyncio.gather(*[main._index_profile(("steam", str(k)))
+                                   for k in range(a.commands, a.roster)])
+    await asyncio.sleep(0.2)                 # let the queue fill
+
+    lat = []
+    for k in range(a.commands):
+        t0 = time.perf_counter()
+        await main.bf6_player.callback(FakeInteraction(), name=f"player{k}")
+        lat.append(time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    await backlog
+    state = api.scheduler_state()
+    print(f"── {'fifo' if a.fifo else 'scheduler'}: {a.roster - a.commands:,} "
+          f"background fetches, {a.latency * 1000:.0f} ms upstream")
+    print(f"  /bf6 player   p50 {pct(lat, .5) * 1000:8.1f}  "
+          f"p95 {pct(lat, .95) * 1000:8.1f}  max {max(lat) * 1000:8.1f} ms")
+    print(f"  backlog drained {time.perf_counter() - t0:.1f} s after the "
+          f"last command; expired {state['expired']}")
+    await api.close()
+    await main.ROSTER.close(); await main.STORE.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--roster", type=int, default=2000)
+    ap.add_argument("--commands", type=int, default=20)
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--fifo", action="store_true")
+    a = ap.parse_args()
+    base = fake_tracker.start(fake_tracker.Config(a.latency))
+    with tempfile.TemporaryDirectory() as d:
+        asyncio.run(run(load_bot(a.roster, base, d), a))
@@ -0,0 +1,82 @@
+"""
+1,000 back-to-back roster edits: write-behind RosterStore vs. the old
+synchronous `json.dump` of the whole roster after every edit.
+
+    python bench/roster_writes.py --roster 5000 --edits 1000
+
+Reports time the event loop spent blocked and the number of disk writes;
+everything happens in a temp directory.
+"""
+from __future__ import annotations
+import os, sys, json, time, asyncio, argparse, tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from roster import RosterStore
+
+
+def _players(n: int) -> dict[tuple[str, str], dict]:
+    return {("steam", str(i)): {"name": f"player{i}", "platform": "steam",
+                                "userId": str(i)} for i in range(n)}
+
+
+def _edits(n: int) -> list[tuple[str, dict]]:
+    """Alternating add / remove of fresh players."""
+    out = []
+    for i in range(n // 2):
+        p = {"name": f"new{i}", "platform": "ps", "userId": f"n{i}"}
+        out += [("add", p), ("remove", p)]
+    return out
+
+
+def legacy(path: str, roster: dict, edits) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    for op, p in edits:
+        key = (p["platform"], p["userId"])
+        if op == "add": roster[key] = p
+        else:           roster.pop(key, None)
+        with open(path, "w", encoding="utf8") as f:
+            json.dump(list(roster.values()), f, indent=2)
+    return time.perf_counter() - t0, len(edits)
+
+
+async def write_behind(path: str, roster: dict, edits) -> tuple[float, float, int]:
+    store = RosterStore(path, lambda: roster.values(), delay=0.05)
+    store.load()
+    t0 = time.perf_counter()
+    for op, p in edits:
+        key = (p["platform"], p["userId"])
+        if op == "add": roster[key] = p
+        else:           roster.pop(key, None)
+        store.append(op, p)
+    on_loop = time.perf_counter() - t0
+    await store.close()
+    return on_loop, time.perf_counter() - t0, store.writes
+
+
+def _size(*paths: str) -> int:
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+
+async def main(n_roster: int, n_edits: int) -> None:
+    edits = _edits(n_edits)
+    with tempfile.TemporaryDirectory() as d:
+        a = os.path.join(d, "legacy.json")
+        blocked, writes = legacy(a, _players(n_roster), edits)
+        print(f"legacy json.dump : {blocked*1000:8.1f} ms blocked, "
+              f"{writes} writes, file {_size(a)/1024:.0f} KiB each")
+
+        b = os.path.join(d, "players.json")
+        with open(b, "w", encoding="utf8") as f:
+            json.dump(list(_players(n_roster).values()), f)
+        on_loop, total, writes = await write_behind(b, _players(n_roster), edits)
+        print(f"write-behind     : {on_loop*1000:8.1f} ms blocked, "
+              f"{writes} writes, {total*1000:.1f} ms until durable")
+        assert len(RosterStore(b, list).load()) == n_roster
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--roster", type=int, default=5000)
+    ap.add_argument("--edits",  type=int, default=1000)
+    a = ap.parse_args()
+    asyncio.run(main(a.roster, a.edits))
@@ -0,0 +1,79 @@
+"""
+Startup benchmark: time from process start to the first served command.
+
+    python bench/startup.py                  # roster of 1k
+    python bench/startup.py --roster 10000 --latency 0.005
+
+Each run is a fresh interpreter against the fake tracker.  The first run
+starts from an empty database (cold); the second reuses it (warm), so
+profiles come from the snapshots instead of tracker.gg.  Phases:
+import main → setup_hook returned (gateway could connect) → first
+/bf6 player reply → first /bf6 leaderboard reply.
+"""
+from __future__ import annotations
+import os, sys, time, asyncio, argparse, tempfile, subprocess
+T0 = time.perf_counter()
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def child(a) -> None:
+    import fake_tracker
+    from harness import FakeInteraction
+    base = fake_tracker.start(fake_tracker.Config(a.latency))
+    os.environ.setdefault("DISCORD_BOT_TOKEN", "bench")
+    os.environ["BF6_DB"] = os.path.join(a.workdir, "bf6.sqlite3")
+    for kind in ("PROFILE", "MATCHES", "SEARCH"):
+        os.environ.setdefault(f"TRN_RATE_{kind}", "100000/100000")
+    os.chdir(a.workdir)
+    t_bench = time.perf_counter() - T0       # interpreter + benchmark deps
+
+    t = time.perf_counter()
+    import main
+    main.api_handler.BASE = base
+    t_import = time.perf_counter() - t
+
+    async def run():
+        from discord import app_commands
+        t = time.perf_counter()
+        await main.setup_hook()
+        t_hook = time.perf_counter() - t
+        i = FakeInteraction()
+        await main.bf6_player.callback(i, name="player0")
+        t_player = time.perf_counter() - t
+        i = FakeInteraction()
+        await main.bf6_leaderboard.callback(
+            i, stat=app_commands.Choice(name="K/D", value="kd"))
+        t_board = time.perf_counter() - t
+        await asyncio.sleep(0.5)             # let snapshot writes land
+        await main.api_handler.close()
+        await main.ROSTER.close(); await main.STORE.close()
+        return t_hook, t_player, t_board
+
+    t_hook, t_player, t_board = asyncio.run(run())
+    ms = lambda s: f"{s * 1000:8.1f} ms"
+    print(f"  {'import main':<24}{ms(t_import)}   (+{ms(t_bench).strip()} "
+          f"interpreter/bench)")
+    print(f"  {'setup_hook returned':<24}{ms(t_import + t_hook)}")
+    print(f"  {'first /bf6 player':<24}{ms(t_import + t_player)}")
+    print(f"  {'first /bf6 leaderboard':<24}{ms(t_import + t_board)}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--roster", type=int, default=1000)
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--workdir", help=argparse.SUPPRESS)
+    a = ap.parse_args()
+    if a.workdir:
+        child(a)
+    else:
+        from harness import write_roster
+        with tempfile.TemporaryDirectory() as d:
+            write_roster(os.path.join(d, "players.json"), a.roster)
+            for label in ("cold (empty database)", "warm (snapshots on disk)"):
+                print(f"── {label}, roster {a.roster:,}")
+                subprocess.run([sys.executable, __file__, "--workdir", d,
+                                f"--roster={a.roster}",
+                                f"--latency={a.latency}"], check=True)
@@ -0,0 +1,102 @@
+"""
+Event-loop responsiveness while N slow tracker.gg calls are in flight.
+
+    python bench/transport_latency.py              # pooled aiohttp transport
+    python bench/transport_latency.py --legacy     # old inline requests.get
+
+A stub server on its own thread/loop answers every request after `--delay`
+seconds.  A ticker coroutine wakes every 10 ms and records how late it was;
+with a blocking transport the lag grows to the full upstream latency.
+"""
+from __future__ import annotations
+import os, sys, time, asyncio, argparse, statistics, threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import requests
+from aiohttp import web
+import api_handler
+
+
+class BlockingTransport:
+    """What `_fetch` used to do: a synchronous GET on the event loop."""
+    async def get(self, url, *, params=None, headers=None, timeout=15.0):
+        r = requests.get(url, params=params, headers=headers, timeout=timeout)
+        return api_handler.Response(r.status_code, r.headers, r.content)
+
+    solve = get
+
+    async def close(self): pass
+
+
+def _stub(delay: float) -> str:
+    """Serve /slow from a daemon thread so a blocked bot loop can't stall it."""
+    async def slow(_):
+        await asyncio.sleep(delay)
+        return web.json_response({"data": {"ok": True}})
+
+    url: list[str] = []
+    started = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_get("/slow", slow)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        loop.run_until_complete(site.start())
+        port = site._server.sockets[0].getsockname()[1]
+        url.append(f"http://127.0.0.1:{port}/slow")
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return url[0]
+
+
+async def _ticker(lags: list[float], stop: asyncio.Event, tick=0.01):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(tick)
+        lags.append(time.perf_counter() - t0 - tick)
+
+
+def _pct(xs: list[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+async def main(n: int, delay: float, legacy: bool) -> None:
+    url = _stub(delay)
+    if legacy:
+        api_handler.set_transport(BlockingTransport())
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(_ticker(lags, stop))
+
+    t0 = time.perf_counter()
+    res = await asyncio.gather(*[
+        api_handler._fetch(url, params={"i": k}, fresh=True) for k in range(n)
+    ])
+    wall = time.perf_counter() - t0
+
+    stop.set(); await tick
+    await api_handler.close()
+
+    ok = sum(r is not None for r in res)
+    print(f"transport : {'blocking requests' if legacy else 'aiohttp pool'}")
+    print(f"requests  : {ok}/{n} ok, upstream delay {delay*1000:.0f} ms, "
+          f"wall {wall:.2f} s")
+    print(f"loop lag  : p50 {statistics.median(lags)*1000:.1f} ms  "
+          f"p99 {_pct(lags, .99)*1000:.1f} ms  max {max(lags)*1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=32, help="concurrent requests")
+    ap.add_argument("--delay", type=float, default=0.5, help="stub latency (s)")
+    ap.add_argument("--legacy", action="store_true")
+    a = ap.parse_args()
+    asyncio.run(main(a.n, a.delay, a.legacy))
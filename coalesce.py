@@ -0,0 +1,81 @@
+"""
+Command-level coalescing for bursts of identical slash commands.
+• the first invocation of a key waits `debounce` s, then computes; every
+  identical invocation arriving meanwhile (or while it runs) shares that
+  one computation
+• each interaction still acks with its own defer and gets its own
+  followup – only the work (fetch + embed build) is shared
+• a followup is skipped once its interaction token (15 min) has expired
+• once every waiter is gone (expired, or its interaction vanished) the
+  computation is cancelled, and with it any fetch still queued for it
+"""
+
+from __future__ import annotations
+import asyncio, datetime as dt, typing as t
+import metrics
+
+TOKEN_TTL = dt.timedelta(minutes=15)        # Discord interaction tokens
+
+Reply = dict[str, t.Any]                     # followup.send(**reply)
+
+
+class Coalescer:
+    def __init__(self, *, debounce: float = 0.02, margin: float = 5.0):
+        self.debounce = debounce
+        self.margin   = margin               # s kept spare before expiry
+        self._inflight: dict[t.Hashable, asyncio.Task] = {}
+        self._waiters:  dict[asyncio.Task, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def join(self, key: t.Hashable,
+             compute: t.Callable[[], t.Awaitable[Reply]]) -> asyncio.Task:
+        """The shared computation for `key`, started if there is none.  The
+        caller waits on it with result(), or says it won't with leave()."""
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.incr("coalesce.shared")
+        else:
+            task = asyncio.ensure_future(self._run(compute))
+            self._inflight[key] = task
+            def done(_):
+                if self._inflight.get(key) is task:  # not a newer one
+                    del self._inflight[key]
+                self._waiters.pop(task, None)
+            task.add_done_callback(done)
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        return task
+
+    def leave(self, task: asyncio.Task) -> None:
+        """One waiter is gone; the last one to go cancels the computation."""
+        n = self._waiters.pop(task, 0) - 1
+        if task.done():
+            return
+        if n > 0:
+            self._waiters[task] = n
+            return
+        for key in [k for k, v in self._inflight.items() if v is task]:
+            del self._inflight[key]          # nobody may join it any more
+        task.cancel()
+        metrics.incr("coalesce.cancelled")
+
+    async def _run(self, compute) -> Reply:
+        await asyncio.sleep(self.debounce)   # let the rest of a burst join
+        return await compute()
+
+    async def result(self, created_at: dt.datetime,
+                     task: asyncio.Task) -> Reply | None:
+        """`task`'s reply, or None if the token expires before it is ready."""
+        left = (created_at + TOKEN_TTL
+                - dt.datetime.now(dt.timezone.utc)).total_seconds() - self.margin
+        try:
+            if left > 0:
+                # shield: one expiring waiter must not cancel everybody else's
+                return await asyncio.wait_for(asyncio.shield(task), left)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.leave(task)
+        metrics.incr("coalesce.expired")
+        return None
@@ -0,0 +1,152 @@
+"""
+Per-guild rosters over one shared player store.
+• every tracked player is held, fetched and ranked once, however many
+  guilds track them – guilds only differ in which keys they can see
+• roster entries list their guilds under "guilds"; entries without it are
+  global (visible everywhere), which is what a single-server players.json
+  already is
+• each scope keeps its own autocomplete index and a version that bumps on
+  membership changes, so per-guild boards can be cached
+• `on_change(key)` hears about every membership change of a resolved
+  player (main.py points it at the leaderboard's per-scope rankings)
+"""
+
+from __future__ import annotations
+import typing as t
+from autocomplete import NameIndex, MAX_CHOICES
+
+Key   = tuple[str, str]                      # (platform, userId)
+Scope = t.Optional[int]                      # guild id, None = global
+
+
+class View(t.NamedTuple):
+    """What one guild sees: `keep` is None when that is everybody."""
+    scope:   Scope
+    keep:    t.Callable[[Key], bool] | None
+    version: tuple[int, int]
+
+
+def scopes(p: dict) -> list[Scope]:
+    return p.get("guilds") or [None]
+
+
+def is_global(p: dict) -> bool:
+    """Tracked everywhere – only the bot owner may remove it."""
+    return "guilds" not in p
+
+
+def _key(p: dict) -> Key:
+    return p["platform"], p["userId"]
+
+
+class GuildRosters:
+    def __init__(self, players: t.Iterable[dict] = (), *,
+                 on_change: t.Callable[[Key], None] | None = None):
+        self._keys:  dict[Scope, set[Key]]   = {None: set()}
+        self._names: dict[Scope, NameIndex]  = {None: NameIndex()}
+        self._ver:   dict[Scope, int]        = {}
+        self.on_change = on_change
+        for p in players:
+            self.track(p)
+
+    def __len__(self) -> int:
+        """Guilds with players of their own."""
+        return sum(1 for g, ks in self._keys.items() if g is not None and ks)
+
+    def _bump(self, g: Scope) -> None:
+        self._ver[g] = self._ver.get(g, 0) + 1
+
+    # ── membership ───────────────────────────────────────────────────────
+    def track(self, p: dict) -> None:
+        """Index a roster entry in every scope it belongs to."""
+        for g in scopes(p):
+            self._add(g, p)
+
+    def untrack(self, p: dict) -> None:
+        for g in scopes(p):
+            self._drop(g, p)
+
+    def resolved(self, p: dict) -> None:
+        """An unresolved entry got its userId – make it visible."""
+        for g in scopes(p):
+            self._keys.setdefault(g, set()).add(_key(p))
+            self._bump(g)
+        self._changed(p)
+
+    def join(self, p: dict, guild: Scope) -> bool:
+        """Share an already tracked player with `guild`; False if it had it."""
+        if guild is None:
+            if "guilds" not in p:
+                return False
+            self.untrack(p); del p["guilds"]; self.track(p)
+            return True
+        if "guilds" not in p or guild in p["guilds"]:
+            return False
+        p["guilds"].append(guild)
+        self._add(guild, p)
+        return True
+
+    def leave(self, p: dict, guild: Scope) -> bool:
+        """Drop `guild` from `p`; True when no scope tracks it any more.
+        A global entry goes everywhere – check is_global() first."""
+        if is_global(p) or guild is None:
+            self.untrack(p)
+            return True
+        if guild in p["guilds"]:
+            p["guilds"].remove(guild)
+            self._drop(guild, p)
+        if p["guilds"]:
+            return False
+        del p["guilds"]                      # nothing left – forget it
+        return True
+
+    def merge(self, into: dict, dupe: dict) -> None:
+        """Fold a duplicate entry's guilds into the one that is kept.  Both
+        share one key, so only the dupe's names go – never the key."""
+        for g in scopes(dupe):
+            if (names := self._names.get(g)) is not None:
+                names.remove(dupe["name"])
+            self._bump(g)
+        for g in scopes(dupe):
+            self.join(into, g)
+
+    def _add(self, g: Scope, p: dict) -> None:
+        self._names.setdefault(g, NameIndex()).add(p["name"])
+        if "userId" in p:
+            self._keys.setdefault(g, set()).add(_key(p))
+        self._bump(g)
+        self._changed(p)
+
+    def _drop(self, g: Scope, p: dict) -> None:
+        if (names := self._names.get(g)) is not None:
+            names.remove(p["name"])
+        if "userId" in p:
+            self._keys.get(g, set()).discard(_key(p))
+        self._bump(g)
+        self._changed(p)
+
+    def _changed(self, p: dict) -> None:
+        if self.on_change is not None and "userId" in p:
+            self.on_change(_key(p))
+
+    # ── queries ──────────────────────────────────────────────────────────
+    def visible(self, guild: Scope, key: Key) -> bool:
+        return key in self._keys[None] or key in self._keys.get(guild, ())
+
+    def view(self, guild: Scope) -> View:
+        own = guild if self._keys.get(guild) else None
+        if own is None and len(self) == 0:
+            return View(None, None, (self._ver.get(None, 0), 0))
+        glob, mine = self._keys[None], self._keys.get(own, set())
+        return View(own, lambda k: k in glob or k in mine,
+                    (self._ver.get(None, 0), self._ver.get(own, 0)))
+
+    def search(self, guild: Scope, cur: str, k: int = MAX_CHOICES) -> list[str]:
+        """Autocomplete over this guild's players and the global ones."""
+        found = self._names[None].search(cur, k)
+        if guild is not None and (mine := self._names.get(guild)):
+            seen = {n.lower() for n in found}
+            found += [n for n in mine.search(cur, k) if n.lower() not in seen]
+            q = cur.lower().strip()
+            found.sort(key=lambda n: not n.lower().startswith(q))   # stable
+        return found[:k]
@@ -0,0 +1,210 @@
+"""
+Incrementally maintained leaderboards.
+• one sorted ranking per STATMAP stat and roster scope (global entries,
+  each guild's own), updated by bisection when a profile is refreshed or
+  a player joins / leaves a roster
+• a guild's board merges the global ranking with its own – O(k), however
+  big the shared roster is
+• the rendered embed description is cached per stat and scope until one
+  of those two rankings changes
+• time-window boards ("last 7 days") are computed from stored snapshot
+  deltas – no API calls
+"""
+
+from __future__ import annotations
+import bisect, heapq, itertools, typing as t
+from records import ProfileRecord
+
+Key   = tuple[str, str]                      # (platform, userId)
+Scope = t.Optional[int]                      # guild id, None = global
+MEDALS = ["🥇", "🥈", "🥉"]
+LB_ROWS = 25                                 # rows rendered per board
+
+
+class Ranking:
+    """Rows `(-value, name_lower, key)` kept sorted best-first."""
+    __slots__ = ("rows", "pos", "version")
+
+    def __init__(self):
+        self.rows: list[tuple[float, str, Key]] = []
+        self.pos:  dict[Key, tuple[float, str, Key]] = {}
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def set(self, key: Key, name: str, value: float) -> bool:
+        row = (-value, name.lower(), key)
+        old = self.pos.get(key)
+        if old == row:
+            return False
+        if old is not None:
+            del self.rows[bisect.bisect_left(self.rows, old)]
+        bisect.insort(self.rows, row)
+        self.pos[key] = row
+        self.version += 1
+        return True
+
+    def discard(self, key: Key) -> bool:
+        old = self.pos.pop(key, None)
+        if old is None:
+            return False
+        del self.rows[bisect.bisect_left(self.rows, old)]
+        self.version += 1
+        return True
+
+    def top(self, k: int) -> t.Iterator[tuple[Key, float]]:
+        for neg, _, key in self.rows[:k]:
+            yield key, -neg
+
+
+_EMPTY = Ranking()
+
+
+class LeaderboardIndex:
+    """
+    statmap  : {stat_key: (tracker field, pretty name)} – main.STATMAP
+    fmt      : fmt(value, field) → display string
+    scope_of : key → the roster scopes it is in (guilds, or [None])
+    """
+    def __init__(self, statmap: dict[str, tuple[str, str]],
+                 fmt: t.Callable[[float, str], str],
+                 scope_of: t.Callable[[Key], t.Sequence[Scope]] = lambda k: [None]):
+        self.fields = {k: field for k, (field, _) in statmap.items()}
+        self.fmt    = fmt
+        self.scope_of = scope_of
+        self.rankings: dict[str, dict[Scope, Ranking]] = {k: {} for k in statmap}
+        self.names:  dict[Key, str] = {}
+        self.values: dict[Key, dict[str, float]] = {}
+        self.scopes: dict[Key, tuple[Scope, ...]] = {}
+        self._desc: dict[tuple[str, Scope],           # (stat, scope) →
+                         tuple[tuple, str | None]] = {}  # (versions, text)
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def update(self, key: Key, name: str,
+               values: t.Mapping[str, float | None]) -> None:
+        """values: {stat_key: value or None (stat missing)}."""
+        if self.names.get(key) not in (None, name):
+            self.remove(key)                 # renamed → re-sort ties
+        self.names[key] = name
+        self.values[key] = {s: v for s, v in values.items() if v is not None}
+        scopes = self.scopes.get(key)
+        if scopes is None:
+            scopes = self.scopes[key] = tuple(self.scope_of(key))
+        for g in scopes:
+            self._place(key, g)
+
+    def rescope(self, key: Key) -> None:
+        """`key` joined or left a guild's roster – move it between boards."""
+        old = self.scopes.get(key)
+        if old is None:
+            return                           # not ranked yet
+        new = self.scopes[key] = tuple(self.scope_of(key))
+        for g in set(old) - set(new):
+            for by_scope in self.rankings.values():
+                if (rk := by_scope.get(g)) is not None: rk.discard(key)
+        for g in set(new) - set(old):
+            self._place(key, g)
+
+    def _place(self, key: Key, g: Scope) -> None:
+        name, values = self.names[key], self.values[key]
+        for stat, by_scope in self.rankings.items():
+            rk = by_scope.get(g)
+            if (v := values.get(stat)) is not None:
+                if rk is None:
+                    rk = by_scope[g] = Ranking()
+                rk.set(key, name, v)
+            elif rk is not None:
+                rk.discard(key)
+
+    def update_profile(self, key: Key, name: str, prof: ProfileRecord) -> None:
+        self.update(key, name, {stat: prof.value(field)
+                                for stat, field in self.fields.items()})
+
+    def remove(self, key: Key) -> None:
+        if self.names.pop(key, None) is None:
+            return
+        self.values.pop(key, None)
+        for g in self.scopes.pop(key, ()):
+            for by_scope in self.rankings.values():
+                if (rk := by_scope.get(g)) is not None: rk.discard(key)
+
+    def _boards(self, stat: str, scope: Scope) -> list[Ranking]:
+        by_scope = self.rankings[stat]
+        glob = by_scope.get(None, _EMPTY)
+        return [glob] if scope is None else [glob, by_scope.get(scope, _EMPTY)]
+
+    def top(self, stat: str, k: int = LB_ROWS,
+            scope: Scope = None) -> list[tuple[str, float]]:
+        """Best `k` of the global entries plus `scope`'s own."""
+        rows = heapq.merge(*(rk.rows[:k] for rk in self._boards(stat, scope)))
+        return [(self.names[key], -neg)
+                for neg, _, key in itertools.islice(rows, k)]
+
+    def description(self, stat: str, k: int = LB_ROWS, *,
+                    scope: Scope = None) -> str | None:
+        """Rendered board text, rebuilt only when one of its rankings
+        changed."""
+        ver = tuple((id(rk), rk.version) for rk in self._boards(stat, scope))
+        hit = self._desc.get((stat, scope))
+        if hit and hit[0] == ver:
+            return hit[1]
+        desc = render(self.top(stat, k, scope), self.fields[stat], self.fmt)
+        self._desc[(stat, scope)] = (ver, desc)
+        return desc
+
+
+def render(rows: t.Iterable[tuple[str, float]], field: str,
+           fmt: t.Callable[[float, str], str]) -> str | None:
+    return "\n".join(
+        f"{MEDALS[i-1] if i<=3 else f'`{i:02}`'} "
+        f"**{name}** — {fmt(v, field)}"
+        for i, (name, v) in enumerate(rows, 1)
+    ) or None
+
+
+# ───────────────────────── time windows ──────────────────────────────────
+WINDOWS = {                                  # choice → (label, seconds)
+    "24h": ("last 24 h",     86_400),
+    "7d":  ("last 7 days",   7 * 86_400),
+    "30d": ("last 30 days", 30 * 86_400),
+}
+
+def _per_min(n: float, secs: float) -> float | None:
+    return n / (secs / 60) if secs > 0 else None
+
+# tracker field → value over a window, from counter deltas `d`
+WINDOW_STATS: dict[str, t.Callable[[dict[str, float]], float | None]] = {
+    "kills":              lambda d: d["kills"],
+    "matchesWon":         lambda d: d["matchesWon"],
+    "kdRatio":            lambda d: d["kills"] / max(d["deaths"], 1),
+    "scorePerMinute":     lambda d: _per_min(d["score"], d["timePlayed"]),
+    "killsPerMinute":     lambda d: _per_min(d["kills"], d["timePlayed"]),
+    "wlPercentage":       lambda d: 100 * d["matchesWon"] / d["matchesPlayed"],
+    "headshotPercentage": lambda d: (100 * d["headshots"] / d["kills"]
+                                     if d["kills"] else None),
+}
+
+
+def window_board(field: str, base: t.Mapping[Key, dict[str, float]],
+                 cur: t.Mapping[Key, dict[str, float]]) -> list[tuple[Key, float]]:
+    """Best-first (key, value) for players who played inside the window."""
+    rows = []
+    for key, now in cur.items():
+        then = base.get(key)
+        if then is None: continue
+        d = {f: v - then[f] for f, v in now.items() if f in then}
+        if d.get("matchesPlayed", 0) <= 0: continue
+        try:
+            v = WINDOW_STATS[field](d)
+        except (KeyError, ZeroDivisionError):
+            continue
+        if v is not None:
+            rows.append((key, v))
+    rows.sort(key=lambda r: -r[1])
+    return rows
@@ -10,14 +10,27 @@ Slash & “!” prefix helpers:
 • /restart  and  /sync              (bot-owner only)
 """
 from __future__ import annotations
-import os, sys, json, asyncio, logging, itertools, warnings, urllib.parse as _urlparse
+import os, io, sys, json, time, asyncio, hashlib, logging, functools, itertools, warnings, urllib.parse as _urlparse
+import datetime as dt, typing as t
 warnings.filterwarnings("ignore", category=UserWarning, module="discord")
 
 import discord
 from discord.ext import commands
 from discord import app_commands, Interaction
 from dotenv import load_dotenv
+import api_handler, metrics
 from api_handler import TrnClient            # ← make sure it exposes .search_players()
+from prefetch import RosterPrefetcher, RefreshQueue
+from leaderboard import LeaderboardIndex, LB_ROWS, WINDOWS, render, window_board
+from store import StatsStore
+from roster import RosterStore
+from matchlog import MatchLog
+from guilds import GuildRosters, scopes, is_global
+from shared import SQLiteShared
+from render_cache import RenderCache
+from coalesce import Coalescer, TOKEN_TTL
+import roster_io
+from records import ProfileRecord, FIELDS
 
 # ───────────────────────── logging ───────────────────────────────────────
 logging.basicConfig(level=logging.INFO,
@@ -29,25 +42,50 @@ load_dotenv()
 TOKEN    = os.environ["DISCORD_BOT_TOKEN"]
 OWNER_ID = int(os.getenv("BOT_OWNER_ID", "0"))
 
+# BF6_SHARDS="auto" or a count → AutoShardedBot, every shard in this one
+# process: the roster (players.json + its log) has a single writer
+SHARDS = os.getenv("BF6_SHARDS", "")
+
 intents = discord.Intents.default()
 intents.message_content = True
-bot  = commands.Bot(command_prefix="!", intents=intents)
+if SHARDS:
+    bot = commands.AutoShardedBot(
+        command_prefix="!", intents=intents,
+        shard_count=None if SHARDS == "auto" else int(SHARDS))
+else:
+    bot = commands.Bot(command_prefix="!", intents=intents)
 tree = bot.tree
 
 # ───────────────────────── roster store ──────────────────────────────────
-with open("players.json", encoding="utf8") as f:
-    PLAYERS: list[dict] = json.load(f)
-
-PLAYER_CACHE: dict[tuple[str, str], dict] = {
-    (p["platform"], p["userId"]): p for p in PLAYERS
-}
+ROSTER = RosterStore(
+    "players.json", lambda: [*PLAYER_CACHE.values(), *UNRESOLVED]
+)
+# filled by load_roster() once the bot is starting, not at import
+PLAYER_CACHE: dict[tuple[str, str], dict] = {}
+UNRESOLVED: list[dict] = []
 NAME_INDEX: dict[str, list[dict]] = {}
-for p in PLAYERS:
-    NAME_INDEX.setdefault(p["name"].lower(), []).append(p)
-NAME_CHOICES = sorted(NAME_INDEX.keys())
+ROSTERS = GuildRosters()                     # per-guild views + autocomplete
+READY = asyncio.Event()                      # roster loaded + warm start done
+STARTUP_ERROR: BaseException | None = None   # set (with READY) if that failed
+
+async def load_roster() -> None:
+    """Read players.json off the loop, then index it."""
+    for p in await asyncio.to_thread(ROSTER.load):
+        if "userId" in p: PLAYER_CACHE[(p["platform"], p["userId"])] = p
+        else:             UNRESOLVED.append(p)
+        NAME_INDEX.setdefault(p["name"].lower(), []).append(p)
+        ROSTERS.track(p)
 
 PLATFORMS = ["steam", "xboxone", "ps"]
 
+# keeps every roster profile warm (started from on_ready)
+PREFETCH = RosterPrefetcher(lambda: list(PLAYER_CACHE))
+# one-off warm-ups: /bf6 refresh and roster imports
+REFRESH = RefreshQueue()
+metrics.gauge("roster.players", lambda: len(PLAYER_CACHE))
+metrics.gauge("roster.guilds",  lambda: len(ROSTERS))
+api_handler.reserve(lambda: len(PLAYER_CACHE))   # profiles never crowded out
+
 # ───────────────────────── stat map ──────────────────────────────────────
 STATMAP = {
     "kd":      ("kdRatio",            "K/D"),
@@ -58,43 +96,165 @@ STATMAP = {
     "winrate": ("wlPercentage",       "Win %"),
     "hs":      ("headshotPercentage", "HS %"),
 }
-
-# ───────────────────────── which overview stats to show ──────────────────
-OVERVIEW_KEYS = [
-    "careerPlayerRank",  # rank     (gets icon & value)
-    "score",
-    "matchesPlayed", "matchesWon", "matchesLost", "wlPercentage",
-    "timePlayed",
-    "kills", "assists", "deaths",
-    "kdRatio", "kdaRatio",
-    "scorePerMinute", "killsPerMinute", "damagePerMinute",
-    "headshotPercentage",
-]
+assert {f for f, _ in STATMAP.values()} <= set(FIELDS), "add it to records.FIELDS"
 
 def fmt(v: float, key: str) -> str:
     if "Percentage" in key: return f"{v:,.2f}%"
     if key in {"kdRatio", "scorePerMinute", "killsPerMinute"}: return f"{v:,.2f}"
     return f"{int(v):,}"
 
+# ───────────────────────── leaderboard index ─────────────────────────────
+# ranked per roster scope; ROSTERS reports membership changes
+BOARD = LeaderboardIndex(STATMAP, fmt, lambda k: scopes(PLAYER_CACHE[k])
+                         if k in PLAYER_CACHE else [None])
+ROSTERS.on_change = BOARD.rescope
+
+# built embeds, reused until their data changes (see render_cache.py)
+EMBEDS = RenderCache()
+metrics.gauge("render.entries", lambda: len(EMBEDS))
+
+# tracked players whose profile fetch came back empty (404, bad payload);
+# the prefetcher retries them, so leaderboards stop fetching them inline
+UNINDEXED: set[tuple[str, str]] = set()
+metrics.gauge("board.unindexed", lambda: len(UNINDEXED))
+
+def _on_fetch(kind: str, tag, data) -> None:
+    if kind == "profile" and (p := PLAYER_CACHE.get(tag)):
+        UNINDEXED.discard(tag)
+        BOARD.update_profile(tag, p["name"], data)
+        EMBEDS.invalidate(("player", tag))
+
+api_handler.add_listener(_on_fetch, shared=True)
+
+# ───────────────────────── persistent snapshots ──────────────────────────
+STORE = StatsStore()
+
+def _persist(kind: str, tag, data) -> None:
+    if tag is None or data is None: return
+    if kind == "profile":
+        STORE.put_profile(tag, data.to_json())
+        STORE.put_snapshot(tag, data.columns())
+
+api_handler.add_listener(_persist)
+# several bots sharing one BF6_DB share fetched profiles through it
+if os.getenv("BF6_SHARED_CACHE"):
+    api_handler.set_shared(SQLiteShared(STORE))
+MATCHES = MatchLog(STORE)                    # persists its own matches
+
+async def warm_start():
+    """Serve persisted snapshots at once; the prefetcher refreshes them."""
+    n = 0
+    for key, ts, data, _ in await STORE.load_profiles():
+        if (p := PLAYER_CACHE.get(key)) is None: continue
+        rec = ProfileRecord.from_json(data)
+        api_handler.prime(api_handler.profile_url(*key), rec,
+                          kind="profile", stored=ts, size=rec.nbytes)
+        BOARD.update_profile(key, p["name"], rec)
+        n += 1
+    log.info("Warm start: %s profile snapshot(s)", n)
+
+async def _index_profile(key: tuple[str, str]) -> None:
+    async with TrnClient() as trn:
+        prof = await trn.player_profile(*key)
+    if prof and (p := PLAYER_CACHE.get(key)):
+        BOARD.update_profile(key, p["name"], prof)
+    elif key in PLAYER_CACHE:
+        UNINDEXED.add(key)
+
 # ───────────────────────── helpers ───────────────────────────────────────
-async def safe_defer(i: Interaction, *, ephemeral=None):
+_TASKS: set[asyncio.Task] = set()            # fire-and-forget, kept from GC
+
+def spawn(coro, *, name: str | None = None) -> asyncio.Task:
+    """create_task, referenced until it finishes; a crash gets logged."""
+    task = asyncio.create_task(coro, name=name)
+    _TASKS.add(task)
+    task.add_done_callback(_reap)
+    return task
+
+def _reap(task: asyncio.Task) -> None:
+    _TASKS.discard(task)
+    if not task.cancelled() and (e := task.exception()) is not None:
+        log.error("Background task %s failed", task.get_name(), exc_info=e)
+
+async def safe_defer(i: Interaction, *, ephemeral=None) -> bool:
+    """False once Discord no longer knows the interaction.  A no-op when
+    it was already deferred (see instrumented)."""
+    if i.response.is_done():
+        return True
     try:
-        await asyncio.wait_for(i.response.defer(thinking=True,
-                                                ephemeral=ephemeral), 2.5)
-    except (discord.NotFound, asyncio.TimeoutError):
-        pass
+        with metrics.timed("cmd.defer"):
+            await asyncio.wait_for(i.response.defer(thinking=True,
+                                                    ephemeral=ephemeral), 2.5)
+    except discord.NotFound:
+        metrics.incr("cmd.defer_failed")
+        return False
+    except asyncio.TimeoutError:
+        metrics.incr("cmd.defer_failed")
+    return True
+
+# how long (s) a command's fetches may queue before it answers from cache
+CMD_DEADLINE = float(os.getenv("BF6_CMD_DEADLINE", "20"))
+
+def _deadline(i: Interaction) -> float:
+    """Monotonic deadline for `i`'s fetches – never past its token."""
+    left = (i.created_at + TOKEN_TTL - discord.utils.utcnow()).total_seconds()
+    return time.monotonic() + min(CMD_DEADLINE, left - COALESCE.margin)
+
+def instrumented(name: str, *, ephemeral=None):
+    """Time a command handler as `cmd.<name>`; handlers wait for startup
+    (roster + warm start) first – deferred as `ephemeral` while they do, so
+    a slow start can't miss Discord's 3 s window – and fetch as interactive
+    requests.  Lives in this module so discord.py resolves the wrapped
+    annotations against main's globals."""
+    def deco(fn):
+        @functools.wraps(fn)
+        async def wrapper(i: Interaction, *args, **kwargs):
+            with metrics.timed(f"cmd.{name}"), api_handler.request_class(
+                    api_handler.INTERACTIVE, _deadline(i)):
+                if not READY.is_set():
+                    await safe_defer(i, ephemeral=ephemeral)
+                    await READY.wait()
+                if STARTUP_ERROR is not None:
+                    await safe_defer(i, ephemeral=True)
+                    return await i.followup.send(
+                        "⚠️ The bot failed to start – check its log.",
+                        ephemeral=True)
+                return await fn(i, *args, **kwargs)
+        return wrapper
+    return deco
+
+# identical in-flight commands share one computation (see coalesce.py)
+COALESCE = Coalescer()
+metrics.gauge("coalesce.inflight", lambda: len(COALESCE))
+
+async def coalesced_reply(i: Interaction, key, compute) -> None:
+    """Defer, then send the reply shared by every identical command."""
+    task = COALESCE.join(key, compute)       # debounce runs during the defer
+    if not await safe_defer(i):
+        return COALESCE.leave(task)          # gone: the last one cancels it
+    if (reply := await COALESCE.result(i.created_at, task)) is not None:
+        await i.followup.send(**reply)
 
 def _choices(seq, cur):                    # for autocomplete
     cur = cur.lower()
     return [app_commands.Choice(name=s, value=s)
             for s in itertools.islice((s for s in seq if cur in s.lower()), 20)]
 
-async def ac_player(_, cur):   return _choices(NAME_CHOICES, cur)
+async def ac_player(i: Interaction, cur):
+    if not READY.is_set(): return []
+    with metrics.timed("ac.player"):
+        return [app_commands.Choice(name=s, value=s)
+                for s in ROSTERS.search(i.guild_id, cur)]
 async def ac_platform(_, cur): return _choices(PLATFORMS, cur)
 
-def find_player_by_name(name: str) -> dict | None:
-    lst = NAME_INDEX.get(name.lower())
-    return lst[0] if lst else None
+def _visible(name: str, guild: int | None) -> list[dict]:
+    """Resolved roster entries called `name` that `guild` tracks."""
+    return [p for p in NAME_INDEX.get(name.lower()) or ()
+            if "userId" in p
+            and ROSTERS.visible(guild, (p["platform"], p["userId"]))]
+
+def find_player_by_name(name: str, guild: int | None = None) -> dict | None:
+    return next(iter(_visible(name, guild)), None)
 
 def _flag(cc: str | None) -> str:
     """Convert ISO-3166 code → regional-indicator emoji (🇺🇸, 🇳🇿 …)."""
@@ -152,94 +312,166 @@ class ConfirmView(discord.ui.View):
         return inter.user.id == self.author_id
 
 # ───────────────────────── ID resolver (startup) ────────────────────────
-async def resolve_ids():
-    need = [p for p in PLAYER_CACHE.values() if "userId" not in p]
-    if not need: return
-    async with TrnClient() as trn:
-        tasks = [trn.search_players(p["platform"], p["name"]) for p in need]
-        results = await asyncio.gather(*tasks)
+RESOLVE_CHUNK = 25          # names per batch (roster saved after each)
+RESOLVE_SLOTS = 2           # concurrent searches – leaves room for commands
+RESOLVE_RETRY = 6 * 3600    # s before a name nobody matched is tried again
+LOOKUP_FAILED = object()    # search_chunks: the search itself failed
+_resolver: asyncio.Task | None = None
+
+def start_resolver():
+    """Resolve missing IDs once per process, in the background."""
+    global _resolver
+    if _resolver is None and UNRESOLVED:
+        with api_handler.request_class(api_handler.BACKGROUND):
+            _resolver = asyncio.create_task(resolve_ids(), name="bf6-resolve")
+
+async def search_chunks(pairs: list[tuple[str, str]]):
+    """
+    Look (platform, name) pairs up RESOLVE_CHUNK at a time, RESOLVE_SLOTS
+    concurrently (the search token bucket paces them); yields one
+    [((platform, name), first hit, None or LOOKUP_FAILED)] list per chunk.
+    Only None – a search that matched nobody – belongs in lookup_failures.
+    """
+    slots = asyncio.Semaphore(RESOLVE_SLOTS)
+    async def lookup(trn: TrnClient, pair: tuple[str, str]):
+        async with slots:
+            hits = await trn.search_players(*pair)
+        if hits is None:
+            return LOOKUP_FAILED
+        return hits[0] if hits else None
 
-    for p, hits in zip(need, results):
-        if hits:
-            p["userId"] = hits[0]["titleUserId"]
-            log.info("ID for %-15s → %s", p["name"], p["userId"])
-        else:
-            log.warning("ID lookup failed for %s", p["name"])
+    async with TrnClient() as trn:
+        for n in range(0, len(pairs), RESOLVE_CHUNK):
+            chunk = pairs[n:n + RESOLVE_CHUNK]
+            yield list(zip(chunk, await asyncio.gather(
+                *[lookup(trn, pair) for pair in chunk])))
 
-    with open("players.json", "w", encoding="utf8") as f:
-        json.dump(list(PLAYER_CACHE.values()), f, indent=2)
+async def resolve_ids():
+    # identical (platform, name) pairs are looked up once
+    groups: dict[tuple[str, str], list[dict]] = {}
+    for p in UNRESOLVED:
+        groups.setdefault((p["platform"], p["name"].lower()), []).append(p)
+    failed = await STORE.lookup_failures(RESOLVE_RETRY)
+    todo = [k for k in groups if k not in failed]
+    if not todo: return
+    log.info("Resolving %s roster ID(s) (%s recently failed, skipped)",
+             len(todo), len(groups) - len(todo))
+
+    async for chunk in search_chunks([(k[0], groups[k][0]["name"])
+                                      for k in todo]):
+        misses = []
+        for (platform, name), hit in chunk:
+            k = (platform, name.lower())
+            if hit is LOOKUP_FAILED:         # upstream trouble: next start
+                log.warning("ID lookup for %s failed, will retry", name)
+                continue
+            if hit is None:
+                log.warning("ID lookup failed for %s", name)
+                misses.append(k); continue
+            first, *dupes = groups[k]
+            first["userId"] = hit["titleUserId"]
+            log.info("ID for %-15s → %s", first["name"], first["userId"])
+            key = (first["platform"], first["userId"])
+            kept = PLAYER_CACHE.setdefault(key, first)
+            if kept is not first:
+                dupes.append(first)          # already tracked under its ID
+            else:
+                ROSTERS.resolved(first)
+            for p in groups[k]:
+                UNRESOLVED.remove(p)
+            for p in dupes:                  # same player listed twice
+                NAME_INDEX[p["name"].lower()].remove(p)
+                ROSTERS.merge(kept, p)
+        STORE.put_lookup_failures(misses)
+        if any(isinstance(hit, dict) for _, hit in chunk):   # resumable
+            ROSTER.rewrite()
 
 # ───────────────────────── embeds & commands ────────────────────────────
-async def leaderboard_embed(stat_key: str):
-    field, pretty = STATMAP[stat_key]
-    async with TrnClient() as trn:
-        profs = await asyncio.gather(
-            *[trn.player_profile(p["platform"], p["userId"])
-              for p in PLAYER_CACHE.values()]
-        )
-
-    board = []
-    for p, prof in zip(PLAYER_CACHE.values(), profs):
-        try:
-            v = float(prof["segments"][0]["stats"][field]["value"])
-            board.append((p["name"], v))
-        except Exception: pass
-
-    if not board: return None
-    board.sort(key=lambda x: x[1], reverse=True)
-
-    medals = ["🥇","🥈","🥉"]
-    desc = "\n".join(
-        f"{medals[i-1] if i<=3 else f'`{i:02}`'} "
-        f"**{name}** — {fmt(v, field)}"
-        for i, (name, v) in enumerate(board, 1)
-    )
-    return (discord.Embed(title=f"Battlefield 6 – {pretty} leaderboard",
+async def leaderboard_embed(stat_key: str, guild: int | None = None):
+    _, pretty = STATMAP[stat_key]
+    view = ROSTERS.view(guild)
+    # only players never tried yet need a fetch; the prefetcher keeps
+    # everybody else current (and retries UNINDEXED) through _on_fetch
+    cold = [k for k in PLAYER_CACHE
+            if k not in BOARD and k not in UNINDEXED
+            and (view.keep is None or view.keep(k))
+            ] if len(BOARD) + len(UNINDEXED) < len(PLAYER_CACHE) else []
+    if cold:
+        with api_handler.request_class(api_handler.FANOUT):
+            await asyncio.gather(*[_index_profile(k) for k in cold])
+
+    with metrics.timed("embed.leaderboard"):
+        desc = BOARD.description(stat_key, scope=view.scope)
+        if not desc: return None
+        return EMBEDS.get(("board", stat_key, view.scope), desc, lambda:
+            discord.Embed(title=f"Battlefield 6 – {pretty} leaderboard",
                           description=desc, colour=0x0096FF)
             .set_footer(text="Data • tracker.gg • cached 30 s"))
 
+_WINDOW_TTL  = 60                            # s a window board is reused
+_WINDOW_DESC: dict[tuple, tuple[float, tuple, str | None]] = {}
+
+async def window_leaderboard_embed(stat_key: str, window: str,
+                                   guild: int | None = None):
+    """Leaderboard over a time window, from stored snapshot deltas."""
+    field, pretty = STATMAP[stat_key]
+    label, span = WINDOWS[window]
+    view = ROSTERS.view(guild)
+    hit = _WINDOW_DESC.get((stat_key, window, view.scope))
+    if hit and hit[0] > time.monotonic() and hit[1] == view.version:
+        desc = hit[2]
+    else:
+        base = await STORE.window_baselines(time.time() - span)
+        cur  = await STORE.latest_snapshots()
+        for k in PLAYER_CACHE:               # in-memory beats the last snapshot
+            if rec := api_handler.peek(api_handler.profile_url(*k)):
+                cur[k] = rec.columns()
+        unpack = ProfileRecord.unpack
+        rows = window_board(field,
+                            {k: unpack(v) for k, v in base.items()},
+                            {k: unpack(v) for k, v in cur.items()
+                             if k in PLAYER_CACHE
+                             and (view.keep is None or view.keep(k))})
+        with metrics.timed("embed.leaderboard_window"):
+            desc = render(((PLAYER_CACHE[k]["name"], v) for k, v in rows[:LB_ROWS]),
+                          field, fmt)
+        _WINDOW_DESC[(stat_key, window, view.scope)] = (
+            time.monotonic() + _WINDOW_TTL, view.version, desc)
+    if not desc: return None
+    return EMBEDS.get(("board", stat_key, window, view.scope), desc, lambda:
+        discord.Embed(title=f"Battlefield 6 – {pretty} leaderboard ({label})",
+                      description=desc, colour=0x0096FF)
+        .set_footer(text="Data • tracker.gg • local snapshots"))
+
 # group
 bf6 = app_commands.Group(name="bf6", description="Battlefield 6 stats suite")
 tree.add_command(bf6)
 
 @bf6.command(name="leaderboard")
 @app_commands.choices(
-    stat=[app_commands.Choice(name=v[1], value=k) for k, v in STATMAP.items()]
+    stat=[app_commands.Choice(name=v[1], value=k) for k, v in STATMAP.items()],
+    window=[app_commands.Choice(name=v[0], value=k) for k, v in WINDOWS.items()],
 )
-async def bf6_leaderboard(i: Interaction, stat: app_commands.Choice[str]):
-    await safe_defer(i)
-    emb = await leaderboard_embed(stat.value)
-    await i.followup.send(embed=emb or discord.Embed(description="No data."))
-
-@bf6.command(name="player")
-@app_commands.autocomplete(name=ac_player)
-async def bf6_player(i: Interaction, name: str):
-    await safe_defer(i)
-    p = find_player_by_name(name)
-    if not p:
-        return await i.followup.send("Player not found.")
-
-    async with TrnClient() as trn:
-        prof = await trn.player_profile(p["platform"], p["userId"])
-    if not prof:
-        return await i.followup.send("API error.")
-
-    # API sometimes wraps under .data – handle both shapes
-    data = prof.get("data", prof)
-    segs = data["segments"]
-    overview = segs[0]["stats"]
-
-    # country flag
-    flag = _flag(data.get("userInfo", {}).get("countryCode"))
-
+@instrumented("leaderboard")
+async def bf6_leaderboard(i: Interaction, stat: app_commands.Choice[str],
+                          window: app_commands.Choice[str] | None = None):
+    guild, win = i.guild_id, window.value if window else None
+    async def compute():
+        emb = await (window_leaderboard_embed(stat.value, win, guild) if win
+                     else leaderboard_embed(stat.value, guild))
+        return {"embed": emb or discord.Embed(description="No data.")}
+    # guilds with the same view share one board
+    await coalesced_reply(i, ("leaderboard", stat.value, win,
+                              ROSTERS.view(guild).scope), compute)
+
+def player_embed(p: dict, prof: ProfileRecord) -> discord.Embed:
     emb = discord.Embed(
-        title=f"BF6 – {p['name']} {flag}",
+        title=f"BF6 – {p['name']} {_flag(prof.country)}",
         colour=0x3498DB,
     )
 
     # rank icon thumbnail (encoded into the imgsvc proxy)
-    rank_stat = overview.get("careerPlayerRank")
-    if rank_stat and (img := rank_stat.get("metadata", {}).get("imageUrl")):
+    if img := prof.rank_image:
         encoded = _urlparse.quote(img, safe="")
         thumb = (
             f"https://imgsvc.trackercdn.com/url/max-width(168),quality(70)/"
@@ -247,49 +479,59 @@ async def bf6_player(i: Interaction, name: str):
         )
         emb.set_thumbnail(url=thumb)
 
-    # add the selected overview stats
-    for key in OVERVIEW_KEYS:
-        s = overview.get(key)
-        if not s or key == "careerPlayerRank":
-            # rank already handled via thumbnail + will still add field below
-            pass
-        if s:  # add every stat we actually got back
-            emb.add_field(
-                name=s["displayName"],
-                value=s["displayValue"],
-                inline=True,
-            )
+    # every records.OVERVIEW_KEYS stat we got back, rank included
+    for name, value in prof.display:
+        emb.add_field(name=name, value=value, inline=True)
+    return emb
 
-    await i.followup.send(embed=emb)
+@bf6.command(name="player")
+@app_commands.autocomplete(name=ac_player)
+@instrumented("player")
+async def bf6_player(i: Interaction, name: str):
+    p = find_player_by_name(name, i.guild_id)
+    if not p:
+        await safe_defer(i)
+        return await i.followup.send("Player not found.")
+    key = (p["platform"], p["userId"])
+
+    async def compute():
+        async with TrnClient() as trn:
+            prof = await trn.player_profile(*key)
+        if not prof:
+            return {"content": "API error."}
+        with metrics.timed("embed.player"):      # record identity = version
+            return {"embed": EMBEDS.get(("player", key), (prof, p["name"]),
+                                        lambda: player_embed(p, prof))}
+    await coalesced_reply(i, ("player", key), compute)
 
 @bf6.command(name="recent")
 @app_commands.autocomplete(name=ac_player)
+@instrumented("recent")
 async def bf6_recent(i: Interaction, name: str,
                      count: app_commands.Range[int,1,10]):
-    await safe_defer(i)
-    p = find_player_by_name(name)
-    if not p: return await i.followup.send("Player not found.")
-    async with TrnClient() as trn:
-        matches = await trn.recent_matches(p["platform"], p["userId"], count)
-    if not matches:
-        return await i.followup.send(f"🕑 No recent matches for **{name}**.",
-                                     ephemeral=True)
+    p = find_player_by_name(name, i.guild_id)
+    if not p:
+        await safe_defer(i)
+        return await i.followup.send("Player not found.")
+    key = (p["platform"], p["userId"])
+    await coalesced_reply(i, ("recent", key, count),
+                          lambda: recent_reply(p, key, count))
 
-    lines = []
-    for m in matches:
-        seg = m["segments"][0]
-        meta = m.get("metadata",{}) or seg.get("metadata",{})
-        date = (meta.get("timestamp") or "")[:10] or "--------"
-        ks   = seg["stats"]
-        lines.append(
-            f"**{date}** – {ks['kills']['displayValue']}/"
-            f"{ks['deaths']['displayValue']} "
-            f"K/D `{ks['kdRatio']['displayValue']}`"
-        )
-    await i.followup.send(
-        embed=discord.Embed(title=f"Last {len(matches)} – {p['name']}",
-                            description="\n".join(lines),
-                            colour=0x00AEEF))
+async def recent_reply(p: dict, key: tuple[str, str], count: int) -> dict:
+    matches = await MATCHES.recent(key, count)
+    if not matches:
+        return {"content": f"🕑 No recent matches for **{p['name']}**.",
+                "ephemeral": True}
+
+    lines = [f"**{m.ts[:10] or '--------'}** – {m.kills:.0f}/{m.deaths:.0f} "
+             f"K/D `{m.kd:.2f}`" for m in matches]
+    agg = MATCHES.aggregate(key)
+    return {"embed": discord.Embed(title=f"Last {len(matches)} – {p['name']}",
+                                   description="\n".join(lines),
+                                   colour=0x00AEEF)
+            .set_footer(text=f"{agg['matches']} logged matches • "
+                             f"{agg['kills']:.0f}/{agg['deaths']:.0f} "
+                             f"K/D {agg['kd']:.2f}")}
 
 # ───────────────────────── roster admin ──────────────────────────────────
 def is_admin(i: Interaction): return i.user.guild_permissions.manage_guild
@@ -298,6 +540,7 @@ def is_admin(i: Interaction): return i.user.guild_permissions.manage_guild
 @app_commands.default_permissions(manage_guild=True)
 @app_commands.check(is_admin)
 @app_commands.autocomplete(platform=ac_platform)
+@instrumented("roster_add", ephemeral=True)
 async def bf6_add(i: Interaction, query: str, platform: str):
     await safe_defer(i, ephemeral=True)
     platform = platform.lower().strip()
@@ -306,6 +549,9 @@ async def bf6_add(i: Interaction, query: str, platform: str):
 
     async with TrnClient() as trn:
         hits = await trn.search_players(platform, query)
+    if hits is None:
+        return await i.followup.send("⚠️ tracker.gg search is unavailable – "
+                                     "try again later.", ephemeral=True)
     if not hits:
         return await i.followup.send("Player not found.", ephemeral=True)
 
@@ -322,22 +568,32 @@ async def bf6_add(i: Interaction, query: str, platform: str):
     handle  = chosen["platformUserHandle"]
     user_id = chosen["titleUserId"]
     key = (platform, user_id)
-    PLAYER_CACHE[key] = {"name":handle, "platform":platform, "userId":user_id}
-    NAME_INDEX.setdefault(handle.lower(), []).append(PLAYER_CACHE[key])
-    if handle not in NAME_CHOICES: NAME_CHOICES.append(handle)
+    if (p := PLAYER_CACHE.get(key)) is not None:   # tracked elsewhere: share it
+        if not ROSTERS.join(p, i.guild_id):
+            return await i.followup.send(f"**{p['name']}** is already tracked.",
+                                         ephemeral=True)
+        ROSTER.append("update", p)
+        return await i.followup.send(f"✅ Added **{p['name']}** ({platform})",
+                                     ephemeral=True)
 
-    with open("players.json","w",encoding="utf8") as f:
-        json.dump(list(PLAYER_CACHE.values()), f, indent=2)
+    p = PLAYER_CACHE[key] = {"name":handle, "platform":platform, "userId":user_id}
+    if i.guild_id is not None:
+        p["guilds"] = [i.guild_id]
+    NAME_INDEX.setdefault(handle.lower(), []).append(p)
+    ROSTERS.track(p)
+    with api_handler.request_class(api_handler.BACKGROUND):
+        spawn(_index_profile(key), name="bf6-index")
+    ROSTER.append("add", p)
 
     await i.followup.send(f"✅ Added **{handle}** ({platform})", ephemeral=True)
 
 @bf6.command(name="roster_remove")
 @app_commands.default_permissions(manage_guild=True)
 @app_commands.check(is_admin)
+@instrumented("roster_remove", ephemeral=True)
 async def bf6_remove(i: Interaction, name: str):
     await safe_defer(i, ephemeral=True)
-    matches = [p for p in PLAYER_CACHE.values()
-               if p["name"].lower()==name.lower()]
+    matches = _visible(name, i.guild_id)
     if not matches:
         return await i.followup.send("Not in roster.", ephemeral=True)
 
@@ -351,17 +607,214 @@ async def bf6_remove(i: Interaction, name: str):
     else:
         choice = matches[0]
 
-    PLAYER_CACHE.pop((choice["platform"], choice["userId"]), None)
-    NAME_INDEX[choice["name"].lower()].remove(choice)
-    with open("players.json","w",encoding="utf8") as f:
-        json.dump(list(PLAYER_CACHE.values()), f, indent=2)
+    if is_global(choice) and i.user.id != OWNER_ID:
+        return await i.followup.send(
+            f"**{choice['name']}** is on the global roster every server "
+            "shares – only the bot owner can remove them.", ephemeral=True)
+    if not ROSTERS.leave(choice, i.guild_id):    # other guilds still track it
+        ROSTER.append("update", choice)
+    else:
+        key = (choice["platform"], choice["userId"])
+        PLAYER_CACHE.pop(key, None)
+        UNINDEXED.discard(key)
+        BOARD.remove(key)
+        EMBEDS.invalidate(("player", key))
+        MATCHES.forget(key)
+        NAME_INDEX[choice["name"].lower()].remove(choice)
+        ROSTER.append("remove", choice)
 
     await i.followup.send(f"🗑️ Removed **{choice['name']}** ({choice['platform']})",
                           ephemeral=True)
 
+# ───────────────────────── bulk roster ──────────────────────────────────
+PROGRESS_EVERY = 5.0        # s between progress edits
+_IMPORTS: dict[int | None, asyncio.Task] = {}    # guild → running import
+
+async def report(i: Interaction, status: t.Callable[[], str],
+                 job: asyncio.Future, title: str) -> None:
+    """
+    Edit the deferred reply with `status()` until `job` finishes, then with
+    its result.  Past the interaction token's lifetime the final result
+    goes to the channel instead.
+    """
+    expires = i.created_at + TOKEN_TTL - dt.timedelta(seconds=30)
+    live = lambda: dt.datetime.now(dt.timezone.utc) < expires
+    while not job.done() and live():
+        try:
+            await i.edit_original_response(content=f"⏳ {title}: {status()}")
+        except discord.HTTPException:
+            pass
+        await asyncio.wait([job], timeout=PROGRESS_EVERY)
+    try:
+        result = await job
+    except Exception:
+        log.exception("%s failed", title)
+        result = f"❌ {title} failed – see the bot log."
+    if live():
+        await i.edit_original_response(content=result)
+    elif i.channel is not None:
+        await i.channel.send(result)
+
+def _scope_players(guild: int | None) -> list[dict]:
+    """Every roster entry `guild` tracks, resolved or not."""
+    return [p for p in (*PLAYER_CACHE.values(), *UNRESOLVED)
+            if guild in scopes(p) or scopes(p) == [None]]
+
+def apply_import(players: t.Iterable[dict], guild: int | None):
+    """Add resolved entries to the roster in one go → (added keys, shared
+    with this guild, already tracked here)."""
+    added, shared, already = [], 0, 0
+    for p in players:
+        key = (p["platform"], p["userId"])
+        if (cur := PLAYER_CACHE.get(key)) is not None:
+            if ROSTERS.join(cur, guild): shared  += 1
+            else:                        already += 1
+            continue
+        if guild is not None:
+            p["guilds"] = [guild]
+        PLAYER_CACHE[key] = p
+        NAME_INDEX.setdefault(p["name"].lower(), []).append(p)
+        ROSTERS.track(p)
+        added.append(key)
+    ROSTER.rewrite()                         # one atomic players.json write
+    return added, shared, already
+
+async def import_roster(entries: list[dict], rejected: int,
+                        guild: int | None, state: dict) -> str:
+    # rows with an ID go straight in; names are resolved first
+    ready: dict[tuple[str, str], dict] = {}
+    names: dict[tuple[str, str], dict] = {}
+    for p in entries:
+        if "userId" in p: ready.setdefault((p["platform"], p["userId"]), p)
+        else:             names.setdefault((p["platform"], p["name"].lower()), p)
+    failed = await STORE.lookup_failures(RESOLVE_RETRY)
+    todo   = [k for k in names if k not in failed]
+    misses = [names[k]["name"] for k in names if k in failed]
+    errors: list[str] = []                   # searches that failed outright
+    state.update(phase="resolving IDs", done=0, total=len(todo))
+    async for chunk in search_chunks([(k[0], names[k]["name"]) for k in todo]):
+        for (platform, name), hit in chunk:
+            if hit is LOOKUP_FAILED:
+                errors.append(name); continue
+            if hit is None:
+                misses.append(name); continue
+            uid = hit["titleUserId"]
+            ready.setdefault((platform, uid), {
+                "name": hit["platformUserHandle"], "platform": platform,
+                "userId": uid})
+        STORE.put_lookup_failures((pl, n.lower()) for (pl, n), hit in chunk
+                                  if hit is None)
+        state["done"] += len(chunk)
+
+    added, shared, already = apply_import(ready.values(), guild)
+    REFRESH.submit(added)                    # new players: fetch profiles
+    log.info("Roster import: %s added, %s shared, %s unresolved, "
+             "%s lookup errors", len(added), shared, len(misses), len(errors))
+    lines = [f"✅ Imported **{len(added):,}** new player(s)",
+             f"• {shared:,} already tracked elsewhere, now shared here",
+             f"• {already:,} already in this roster"]
+    if misses:
+        more = f" (+{len(misses) - 10:,} more)" if len(misses) > 10 else ""
+        lines.append(f"• {len(misses):,} not found: "
+                     + ", ".join(misses[:10]) + more)
+    if errors:
+        lines.append(f"• {len(errors):,} couldn't be looked up (tracker.gg "
+                     "unavailable) – import them again later")
+    if rejected:
+        lines.append(f"• {rejected:,} invalid row(s) skipped")
+    if added:
+        lines.append("Profiles are being fetched in the background.")
+    return "\n".join(lines)
+
+@bf6.command(name="roster_import")
+@app_commands.default_permissions(manage_guild=True)
+@app_commands.check(is_admin)
+@instrumented("roster_import", ephemeral=True)
+async def bf6_import(i: Interaction, file: discord.Attachment):
+    await safe_defer(i, ephemeral=True)
+    guild = i.guild_id
+    if (job := _IMPORTS.get(guild)) and not job.done():
+        return await i.followup.send("An import is already running.",
+                                     ephemeral=True)
+    if file.size > roster_io.MAX_BYTES:
+        return await i.followup.send("❌ File too large (2 MB max).",
+                                     ephemeral=True)
+    try:
+        entries, rejected = roster_io.parse(await file.read(), file.filename,
+                                            PLATFORMS)
+    except ValueError as e:
+        return await i.followup.send(f"❌ Can't read {file.filename}: {e}",
+                                     ephemeral=True)
+    state = {"phase": "starting", "done": 0, "total": 0}
+    with api_handler.request_class(api_handler.BACKGROUND):
+        job = _IMPORTS[guild] = asyncio.create_task(
+            import_roster(entries, rejected, guild, state), name="bf6-import")
+    spawn(report(
+        i, lambda: f"{state['phase']} {state['done']:,}/{state['total']:,}",
+        job, "Roster import"), name="bf6-import-report")
+
+@bf6.command(name="roster_export")
+@app_commands.default_permissions(manage_guild=True)
+@app_commands.check(is_admin)
+@app_commands.choices(format=[app_commands.Choice(name="JSON", value="json"),
+                              app_commands.Choice(name="CSV",  value="csv")])
+@instrumented("roster_export", ephemeral=True)
+async def bf6_export(i: Interaction,
+                     format: app_commands.Choice[str] | None = None):
+    await safe_defer(i, ephemeral=True)
+    fmt = format.value if format else "json"
+    players = sorted(_scope_players(i.guild_id), key=lambda p: p["name"].lower())
+    data = await asyncio.to_thread(roster_io.dump, players, fmt)
+    await i.followup.send(f"📤 {len(players):,} player(s)",
+                          file=discord.File(io.BytesIO(data),
+                                            filename=f"bf6-roster.{fmt}"),
+                          ephemeral=True)
+
+@bf6.command(name="refresh")
+@app_commands.default_permissions(manage_guild=True)
+@app_commands.check(is_admin)
+@instrumented("refresh", ephemeral=True)
+async def bf6_refresh(i: Interaction):
+    await safe_defer(i, ephemeral=True)
+    view = ROSTERS.view(i.guild_id)
+    n = REFRESH.submit(k for k in PLAYER_CACHE
+                       if view.keep is None or view.keep(k))
+    if not REFRESH.running:
+        return await i.followup.send("Nothing to refresh.", ephemeral=True)
+    async def done() -> str:
+        await REFRESH.wait()
+        return f"✅ Refresh finished: {REFRESH.status()}"
+    log.info("Refresh requested: %s profile(s) queued", n)
+    spawn(report(i, REFRESH.status, asyncio.ensure_future(done()), "Refresh"),
+          name="bf6-refresh-report")
+
+# ───────────────────────── diagnostics ──────────────────────────────────
+def _metrics_embed() -> discord.Embed:
+    snap = metrics.snapshot()
+    rows = [f"{'timer (ms)':<28}{'n':>7}{'p50':>8}{'p95':>8}{'p99':>8}"]
+    rows += [f"{k[:28]:<28}{n:>7}{p50:>8.1f}{p95:>8.1f}{p99:>8.1f}"
+             for k, (n, p50, p95, p99) in snap["histograms"].items()]
+    emb = discord.Embed(title="BF6 bot – metrics", colour=0x95A5A6,
+                        description="```\n" + "\n".join(rows)[:4000] + "\n```")
+    for title, items in (("Counters", snap["counters"]),
+                         ("Gauges",   snap["gauges"])):
+        if items:
+            text = "\n".join(f"{k}: {v}" for k, v in items.items())
+            emb.add_field(name=title, value=f"```\n{text[:1000]}\n```",
+                          inline=False)
+    return emb
+
+@bf6.command(name="metrics")
+@app_commands.default_permissions(manage_guild=True)
+@app_commands.check(is_admin)
+async def bf6_metrics(i: Interaction):
+    await i.response.send_message(embed=_metrics_embed(), ephemeral=True)
+
 # ───────────────────────── owner helpers ────────────────────────────────
 async def _restart():
-    await bot.close(); await asyncio.sleep(0.1); sys.exit(0)
+    PREFETCH.stop(); REFRESH.stop(); await bot.close(); await api_handler.close()
+    await ROSTER.close(); await STORE.close()
+    await asyncio.sleep(0.1); sys.exit(0)
 
 @tree.command(name="restart")
 @app_commands.default_permissions(administrator=True)
@@ -380,12 +833,82 @@ async def sync_here(ctx):
     await ctx.send("Slash commands synced ✅")
 
 # ───────────────────────── bot ready ────────────────────────────────────
+async def _housekeeping(every: float = 6 * 3600):
+    while True:
+        try:
+            if n := await STORE.downsample():
+                log.info("Snapshot retention: dropped %s row(s)", n)
+        except Exception:
+            log.exception("snapshot downsampling failed")
+        await asyncio.sleep(every)
+
+async def startup():
+    """Roster + warm start, in the background while the gateway connects."""
+    global STARTUP_ERROR
+    t0 = time.perf_counter()
+    try:
+        await load_roster()
+        await warm_start()
+    except Exception as e:
+        # fail loudly, as a bad players.json did when it loaded at import;
+        # READY still releases the commands waiting on it, with an error
+        log.critical("Startup failed – shutting down", exc_info=True)
+        STARTUP_ERROR = e
+        READY.set()
+        await bot.close()
+        return
+    READY.set()
+    metrics.observe("startup.ready", (time.perf_counter() - t0) * 1000)
+    log.info("Ready: %s player(s) in %.0f ms", len(PLAYER_CACHE),
+             (time.perf_counter() - t0) * 1000)
+    spawn(_housekeeping(), name="bf6-housekeeping")
+
+_startup: asyncio.Task | None = None        # referenced so it isn't GC'd
+
+async def setup_hook():                      # before the gateway connects
+    global _startup
+    _startup = asyncio.create_task(startup(), name="bf6-startup")
+    if port := int(os.getenv("METRICS_PORT", "0")):
+        await metrics.serve(port)
+        log.info("Prometheus metrics on http://127.0.0.1:%s/metrics", port)
+
+bot.setup_hook = setup_hook
+
+def _tree_hash() -> str:
+    cmds = []
+    for c in tree.get_commands():
+        try:
+            cmds.append(c.to_dict())
+        except TypeError:                    # discord.py ≥ 2.4 wants the tree
+            cmds.append(c.to_dict(tree))
+    return hashlib.sha256(json.dumps(cmds, sort_keys=True).encode()).hexdigest()
+
+_synced = False
+
+async def sync_commands() -> None:
+    """Global sync, only when the command definitions changed since the
+    last one – and once per process, not on every reconnect."""
+    global _synced
+    if _synced: return
+    name = f"tree_hash:{bot.application_id}"
+    digest = _tree_hash()
+    if await STORE.get_meta(name) == digest:
+        log.info("Command tree unchanged – sync skipped")
+    else:
+        log.info("Global sync: %s cmd(s)", len(await tree.sync()))
+        STORE.put_meta(name, digest)
+    _synced = True
+
 @bot.event
 async def on_ready():
     log.info("✅ Logged in as %s", bot.user)
-    await resolve_ids()
+    await READY.wait()
+    if STARTUP_ERROR is not None:
+        return
+    start_resolver()
+    PREFETCH.start()
     try:
-        log.info("Global sync: %s cmd(s)", len(await tree.sync()))
+        await sync_commands()
     except Exception as e:
         log.warning("Global sync failed: %s", e)
 
@@ -0,0 +1,106 @@
+"""
+Per-player match log behind /bf6 recent.
+• matches are appended incrementally: each sync pulls page 1 and stops at
+  the first match already logged (deduped by match id), paging further
+  only while every match on the page is new
+• any `count` is served from the log; upstream is asked at most once per
+  `ttl` per player, and concurrent syncs for a player share one request
+• the log is persisted to the store, so it survives restarts and grows
+  past what tracker.gg returns on one page
+• in memory each match is a MatchRecord, and only the `max_players` most
+  recently asked-about players are held; the rest reload from the store
+"""
+
+from __future__ import annotations
+import time, asyncio
+from collections import OrderedDict
+import metrics
+from api_handler import TrnClient, TTLS
+from records import MatchRecord
+from store import StatsStore, match_id
+
+Key = tuple[str, str]                        # (platform, userId)
+
+PAGE      = 10                               # matches per upstream page
+MAX_PAGES = 3                                # per sync, when catching up
+KEEP      = 100                              # matches held per player
+
+
+def _record(m: dict) -> MatchRecord:
+    return MatchRecord.from_payload(m, match_id(m))
+
+
+class MatchLog:
+    def __init__(self, store: StatsStore, *, ttl: float = TTLS["matches"],
+                 max_players: int = 1024):
+        self.store = store
+        self.ttl   = ttl
+        self.max_players = max_players
+        self._log: OrderedDict[Key, list[MatchRecord]] = OrderedDict()  # LRU
+        self._synced: dict[Key, float] = {}          # monotonic
+        self._sync_task: dict[Key, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._log)
+
+    async def recent(self, key: Key, n: int) -> list[MatchRecord]:
+        """Newest `n` matches, syncing first if the log is older than ttl."""
+        if key not in self._log:
+            await self._load(key)
+        self._log.move_to_end(key)
+        if time.monotonic() - self._synced.get(key, -self.ttl) >= self.ttl:
+            task = self._sync_task.get(key)
+            if task is None:
+                task = self._sync_task[key] = asyncio.create_task(self._sync(key))
+                task.add_done_callback(lambda _: self._sync_task.pop(key, None))
+            else:
+                metrics.incr("matchlog.coalesced")
+            await asyncio.shield(task)
+        else:
+            metrics.incr("matchlog.local")
+        return self._log.get(key, [])[:n]    # [] if forgotten meanwhile
+
+    def aggregate(self, key: Key) -> dict[str, float]:
+        """Totals over every logged match held for `key`."""
+        ms = self._log.get(key, [])
+        kills  = sum(m.kills for m in ms)
+        deaths = sum(m.deaths for m in ms)
+        return {"matches": len(ms), "kills": kills, "deaths": deaths,
+                "kd": kills / max(deaths, 1)}
+
+    def forget(self, key: Key) -> None:
+        self._log.pop(key, None); self._synced.pop(key, None)
+        self.store.drop_matches(key)
+
+    # ── internals ────────────────────────────────────────────────────────
+    async def _load(self, key: Key) -> None:
+        ms = await self.store.load_matches(key, KEEP)
+        self._log.setdefault(key, [_record(m) for m in ms])
+        while len(self._log) > self.max_players:
+            old, _ = self._log.popitem(last=False)
+            self._synced.pop(old, None)
+            metrics.incr("matchlog.evicted")
+
+    async def _sync(self, key: Key) -> None:
+        known, new = {m.id for m in self._log.get(key, ())}, []
+        async with TrnClient() as trn:
+            for page in range(1, MAX_PAGES + 1):
+                batch = await trn.recent_matches(*key, PAGE, page)
+                fresh = [m for m in batch if match_id(m) not in known]
+                new += fresh
+                # stop once we reach logged matches, a short page, or a
+                # player we have no history for (one page is enough)
+                if len(fresh) < len(batch) or len(batch) < PAGE or not known:
+                    break
+                metrics.incr("matchlog.catchup")
+        if key not in self._log:             # forgotten or evicted meanwhile
+            return
+        self._synced[key] = time.monotonic()
+        if not new:
+            return
+        uniq = {match_id(m): m for m in new}
+        merged = sorted((*map(_record, uniq.values()), *self._log[key]),
+                        key=lambda m: m.ts, reverse=True)
+        self._log[key] = merged[:KEEP]
+        self.store.put_matches(key, list(uniq.values()))
+        metrics.incr("matchlog.appended", len(uniq))
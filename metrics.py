@@ -0,0 +1,112 @@
+"""
+Low-overhead hot-path metrics.
+• histograms keep a rolling window of recent samples (ms); percentiles
+  are only computed when somebody reads them
+• counters are plain ints, gauges are callables sampled on read
+• exposed through `/bf6 metrics` and, with METRICS_PORT set, a local
+  Prometheus text endpoint
+Recording costs one perf_counter() and one deque append – safe to leave on.
+"""
+
+from __future__ import annotations
+import re, time, typing as t
+from collections import Counter, deque
+
+WINDOW = 2048                                # samples kept per histogram
+
+
+class Histogram:
+    __slots__ = ("samples", "count", "total")
+
+    def __init__(self, window: int = WINDOW):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, v: float) -> None:
+        self.samples.append(v)
+        self.count += 1
+        self.total += v
+
+    def quantiles(self, qs: t.Sequence[float] = (.5, .95, .99)) -> list[float]:
+        xs = sorted(self.samples)
+        if not xs: return [0.0] * len(qs)
+        return [xs[min(len(xs) - 1, int(q * len(xs)))] for q in qs]
+
+
+_HISTS:    dict[str, Histogram] = {}
+_COUNTERS: Counter[str] = Counter()
+_GAUGES:   dict[str, t.Callable[[], float]] = {}
+
+
+def observe(name: str, ms: float) -> None:
+    h = _HISTS.get(name)
+    if h is None:
+        h = _HISTS[name] = Histogram()
+    h.observe(ms)
+
+def incr(name: str, n: int = 1) -> None:
+    _COUNTERS[name] += n
+
+def gauge(name: str, fn: t.Callable[[], float]) -> None:
+    _GAUGES[name] = fn
+
+
+class timed:
+    """`with timed("embed.player"): …` records the block's wall time."""
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, (time.perf_counter() - self.t0) * 1000)
+        return False
+
+
+def snapshot() -> dict[str, t.Any]:
+    return {
+        "histograms": {k: (h.count, *h.quantiles()) for k, h in sorted(_HISTS.items())},
+        "counters":   dict(sorted(_COUNTERS.items())),
+        "gauges":     {k: fn() for k, fn in sorted(_GAUGES.items())},
+    }
+
+
+# ───────────────────────── Prometheus text format ────────────────────────
+def _prom(name: str) -> str:
+    return "bf6_" + re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+def prometheus() -> str:
+    out: list[str] = []
+    for name, h in sorted(_HISTS.items()):
+        m = _prom(name) + "_ms"
+        out.append(f"# TYPE {m} summary")
+        for q, v in zip((.5, .95, .99), h.quantiles()):
+            out.append(f'{m}{{quantile="{q}"}} {v:.3f}')
+        out += [f"{m}_sum {h.total:.3f}", f"{m}_count {h.count}"]
+    for name, v in sorted(_COUNTERS.items()):
+        out += [f"# TYPE {_prom(name)}_total counter",
+                f"{_prom(name)}_total {v}"]
+    for name, fn in sorted(_GAUGES.items()):
+        out += [f"# TYPE {_prom(name)} gauge", f"{_prom(name)} {fn()}"]
+    return "\n".join(out) + "\n"
+
+
+async def serve(port: int, host: str = "127.0.0.1"):
+    """Serve GET /metrics locally; returns the aiohttp runner."""
+    from aiohttp import web
+
+    async def handler(_):
+        return web.Response(text=prometheus(),
+                            content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,137 @@
+"""
+Background roster refresher.
+• keeps every roster profile warm so commands read from memory
+• refreshes are spread evenly across the TTL window (no stampede)
+• refreshes use at most `share` of the profile rate budget, pause while
+  the limiter is blocked or the circuit is open, and widen on failures
+• RefreshQueue is the one-off variant (`/bf6 refresh`, roster imports):
+  never-fetched profiles first, then the stalest, as fast as the profile
+  token bucket allows
+"""
+
+from __future__ import annotations
+import heapq, asyncio, logging, typing as t
+import api_handler
+from api_handler import TrnClient, _TTL
+
+log = logging.getLogger("bf6bot.prefetch")
+
+RosterFn = t.Callable[[], t.Iterable[tuple[str, str]]]   # → (platform, userId)
+
+
+class RosterPrefetcher:
+    def __init__(self, roster: RosterFn, *, window: float = _TTL,
+                 min_gap: float = 0.25, max_gap: float = 30.0,
+                 share: float = 0.5):
+        self.roster  = roster
+        self.window  = window
+        self.min_gap = min_gap
+        self.max_gap = max_gap
+        self.share   = share             # fraction of the rate budget we use
+        self.gap     = min_gap           # adaptive floor between refreshes
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Idempotent – `on_ready` fires again on every gateway reconnect."""
+        if not self.running:
+            with api_handler.request_class(api_handler.BACKGROUND):
+                self._task = asyncio.create_task(self._run(),
+                                                 name="bf6-prefetch")
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    def _adapt(self, ok: bool) -> None:
+        if ok:
+            self.gap = max(self.min_gap, self.gap * 0.9)
+        else:
+            self.gap = min(self.max_gap, self.gap * 2)
+            log.info("upstream trouble – prefetch gap now %.2f s", self.gap)
+
+    def _budget_gap(self) -> float:
+        rate = api_handler.budget("profile") * self.share
+        return 1 / rate if rate else self.max_gap
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        async with TrnClient() as trn:
+            while True:
+                keys = list(self.roster())
+                if not keys:
+                    await asyncio.sleep(self.window); continue
+                for platform, user_id in keys:
+                    t0 = loop.time()
+                    try:
+                        prof = await trn.player_profile(platform, user_id,
+                                                        fresh=True)
+                    except Exception:
+                        log.exception("prefetch %s/%s", platform, user_id)
+                        prof = None
+                    self._adapt(prof is not None)
+                    gap = max(self.window / len(keys), self.gap,
+                              self._budget_gap())
+                    await asyncio.sleep(max(0.0, gap - (loop.time() - t0)))
+
+
+class RefreshQueue:
+    def __init__(self, *, slots: int = 2):
+        self.slots = slots                   # concurrent fetches
+        self._heap: list[tuple[float, tuple[str, str]]] = []
+        self._queued: set[tuple[str, str]] = set()
+        self._task: asyncio.Task | None = None
+        self.done = self.failed = self.total = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def status(self) -> str:
+        return (f"{self.done:,}/{self.total:,} profiles refreshed"
+                + (f", {self.failed:,} failed" if self.failed else ""))
+
+    def submit(self, keys: t.Iterable[tuple[str, str]]) -> int:
+        """Queue keys not already waiting; returns how many were added."""
+        if not self.running:
+            self.done = self.failed = self.total = 0
+        n = 0
+        for key in keys:
+            if key in self._queued: continue
+            stored = api_handler.stored_at(api_handler.profile_url(*key))
+            heapq.heappush(self._heap, (stored or 0.0, key))   # oldest first
+            self._queued.add(key); n += 1
+        self.total += n
+        if n and not self.running:           # /bf6 refresh: not interactive
+            with api_handler.request_class(api_handler.BACKGROUND):
+                self._task = asyncio.create_task(self._run(),
+                                                 name="bf6-refresh")
+        return n
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        async with TrnClient() as trn:
+            while self._heap:
+                batch = [heapq.heappop(self._heap)[1]
+                         for _ in range(min(self.slots, len(self._heap)))]
+                res = await asyncio.gather(
+                    *[trn.player_profile(*k, fresh=True) for k in batch],
+                    return_exceptions=True)
+                for k, prof in zip(batch, res):
+                    self._queued.discard(k)
+                    if isinstance(prof, Exception):
+                        log.warning("refresh %s/%s: %r", *k, prof)
+                    if prof is None or isinstance(prof, Exception):
+                        self.failed += 1
+                    self.done += 1
+        log.info("Refresh finished: %s", self.status())
@@ -0,0 +1,123 @@
+"""
+Compact projections of tracker.gg payloads.
+A full profile is ~70 kB of JSON (every segment, image URL and display
+string); the bot only reads a handful of numbers and the overview display
+values, so those are extracted once at fetch time and the rest is dropped.
+Logged matches get the same treatment (MatchRecord).
+"""
+
+from __future__ import annotations
+import sys, math, typing as t
+from array import array
+
+# numeric columns kept per profile (every STATMAP field must be here).
+# APPEND ONLY – stored snapshots are packed in this order.
+FIELDS: tuple[str, ...] = (
+    "kdRatio", "scorePerMinute", "killsPerMinute", "kills",
+    "matchesWon", "wlPercentage", "headshotPercentage",
+    # raw counters – time-window leaderboards are deltas of these
+    "deaths", "matchesPlayed", "score", "timePlayed", "headshots",
+)
+_COL = {f: n for n, f in enumerate(FIELDS)}
+
+# overview stats shown by /bf6 player, in display order
+OVERVIEW_KEYS = [
+    "careerPlayerRank",  # rank     (gets icon & value)
+    "score",
+    "matchesPlayed", "matchesWon", "matchesLost", "wlPercentage",
+    "timePlayed",
+    "kills", "assists", "deaths",
+    "kdRatio", "kdaRatio",
+    "scorePerMinute", "killsPerMinute", "damagePerMinute",
+    "headshotPercentage",
+]
+
+
+class ProfileRecord:
+    """
+    values  : array('d') aligned with FIELDS, NaN where tracker.gg had none
+    display : ((displayName, displayValue), …) for OVERVIEW_KEYS present
+    """
+    __slots__ = ("values", "display", "country", "rank_image")
+
+    def __init__(self, values: array, display: tuple[tuple[str, str], ...],
+                 country: str | None, rank_image: str | None):
+        self.values, self.display = values, display
+        self.country, self.rank_image = country, rank_image
+
+    def value(self, field: str) -> float | None:
+        v = self.values[_COL[field]]
+        return None if math.isnan(v) else v
+
+    def columns(self) -> bytes:
+        """Packed FIELDS values, as stored in snapshots."""
+        return self.values.tobytes()
+
+    @property
+    def nbytes(self) -> int:
+        """Rough resident size, used for the cache's byte budget."""
+        return (sys.getsizeof(self) + sys.getsizeof(self.values)
+                + sum(len(v) + 64 for _, v in self.display)
+                + len(self.rank_image or ""))
+
+    # ── construction ─────────────────────────────────────────────────────
+    @classmethod
+    def from_payload(cls, data: dict) -> "ProfileRecord":
+        data  = data.get("data", data)       # API sometimes wraps under .data
+        stats = data["segments"][0]["stats"]
+        vals  = array("d", [math.nan] * len(FIELDS))
+        for f, n in _COL.items():
+            try:
+                vals[n] = float(stats[f]["value"])
+            except (KeyError, TypeError, ValueError):
+                pass
+        display = tuple(
+            (sys.intern(s["displayName"]), s["displayValue"])
+            for k in OVERVIEW_KEYS if (s := stats.get(k))
+        )
+        rank = stats.get("careerPlayerRank") or {}
+        return cls(vals, display,
+                   (data.get("userInfo") or {}).get("countryCode"),
+                   (rank.get("metadata") or {}).get("imageUrl"))
+
+    # ── persistence ──────────────────────────────────────────────────────
+    def to_json(self) -> dict[str, t.Any]:
+        return {"v": {f: self.value(f) for f in FIELDS},
+                "d": self.display, "c": self.country, "r": self.rank_image}
+
+    @staticmethod
+    def unpack(blob: bytes) -> dict[str, float]:
+        """Snapshot columns → {field: value}; NaN / missing fields omitted."""
+        vals = array("d"); vals.frombytes(blob)
+        return {f: v for f, v in zip(FIELDS, vals) if not math.isnan(v)}
+
+    @classmethod
+    def from_json(cls, d: dict) -> "ProfileRecord":
+        if "segments" in d or "data" in d:   # raw payload, older snapshot
+            return cls.from_payload(d)
+        vals = array("d", [math.nan if (v := d["v"].get(f)) is None else v
+                           for f in FIELDS])
+        return cls(vals, tuple((sys.intern(n), v) for n, v in d["d"]),
+                   d.get("c"), d.get("r"))
+
+
+class MatchRecord(t.NamedTuple):
+    """One logged match – what /bf6 recent lists and totals, nothing more."""
+    id:     str
+    ts:     str                              # ISO timestamp, "" if unknown
+    kills:  float
+    deaths: float
+    kd:     float
+
+    @classmethod
+    def from_payload(cls, m: dict, match_id: str) -> "MatchRecord":
+        seg  = (m.get("segments") or [{}])[0]
+        meta = m.get("metadata") or seg.get("metadata") or {}
+        def stat(f: str) -> float:
+            try:
+                return float(seg["stats"][f]["value"])
+            except (KeyError, TypeError, ValueError):
+                return 0.0
+        kills, deaths = stat("kills"), stat("deaths")
+        return cls(match_id, meta.get("timestamp") or "", kills, deaths,
+                   stat("kdRatio") or kills / max(deaths, 1))
@@ -0,0 +1,42 @@
+"""
+Built embeds, reused while the data they were built from is unchanged.
+• each entry remembers the `version` it was rendered from (the profile
+  record, the board text …) and is only returned for an equal version
+• listeners drop entries the moment new data is stored, so a stale
+  embed is never served and dead entries don't linger
+• LRU-bounded; embeds are treated as immutable once cached
+"""
+
+from __future__ import annotations
+import typing as t
+from collections import OrderedDict
+import metrics
+
+T = t.TypeVar("T")
+
+
+class RenderCache:
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._d: OrderedDict[t.Hashable, tuple[t.Any, t.Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+    def get(self, key: t.Hashable, version, build: t.Callable[[], T]) -> T:
+        """The embed for `key` at `version`, built on a miss."""
+        hit = self._d.get(key)
+        if hit is not None and hit[0] == version:
+            self._d.move_to_end(key)
+            metrics.incr("render.hit")
+            return hit[1]
+        metrics.incr("render.miss")
+        value = build()
+        self._d[key] = (version, value)
+        self._d.move_to_end(key)
+        while len(self._d) > self.max_entries:
+            self._d.popitem(last=False)
+        return value
+
+    def invalidate(self, key: t.Hashable) -> None:
+        self._d.pop(key, None)
@@ -0,0 +1,148 @@
+"""
+players.json persistence.
+• single edits are appended to a change log (`players.json.log`, JSON
+  lines) instead of rewriting the whole roster
+• writes are write-behind: mutations within `delay` s share one flush,
+  which runs on a worker thread
+• full snapshots go temp file → fsync → atomic rename, and fold the
+  change log away once it passes `compact_every` entries
+"""
+
+from __future__ import annotations
+import os, copy, json, asyncio, logging, typing as t
+
+log = logging.getLogger("bf6bot.roster")
+
+SnapshotFn = t.Callable[[], t.Iterable[dict]]
+
+
+def _ident(p: dict) -> tuple:
+    return p["platform"], p.get("userId"), p["name"]
+
+
+def _atomic_write(path: str, players: list[dict]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf8") as f:
+        json.dump(players, f, indent=2)
+        f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+    try:                                     # persist the rename itself
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try: os.fsync(fd)
+        finally: os.close(fd)
+    except OSError:
+        pass                                 # not supported on Windows
+
+
+def _append(path: str, ops: list[dict]) -> None:
+    with open(path, "a", encoding="utf8") as f:
+        f.writelines(json.dumps(op) + "\n" for op in ops)
+        f.flush(); os.fsync(f.fileno())
+
+
+class RosterStore:
+    def __init__(self, path: str, snapshot: SnapshotFn, *,
+                 delay: float = 0.5, compact_every: int = 500):
+        self.path, self.log_path = path, f"{path}.log"
+        self.snapshot      = snapshot        # current roster, for rewrites
+        self.delay         = delay
+        self.compact_every = compact_every
+        self._ops: list[dict] = []           # not yet on disk
+        self._log_len  = 0
+        self._rewrite  = False
+        self._task: asyncio.Task | None = None
+        self._lock     = asyncio.Lock()
+        self.writes    = 0                   # flushes that touched disk
+
+    # ── load ─────────────────────────────────────────────────────────────
+    def load(self) -> list[dict]:
+        """players.json with the change log replayed on top."""
+        try:
+            with open(self.path, encoding="utf8") as f:
+                players: list[dict] = json.load(f)
+        except FileNotFoundError:
+            players = []
+        try:
+            with open(self.log_path, encoding="utf8") as f:
+                lines = [ln for ln in f if ln.strip()]
+        except FileNotFoundError:
+            lines = []
+        for ln in lines:
+            try:
+                op = json.loads(ln)
+            except ValueError:               # torn final line after a crash
+                log.warning("skipping corrupt roster log entry"); continue
+            # replay is idempotent: a crash between the snapshot rename
+            # and the log removal must not duplicate players
+            if op["op"] == "add":
+                if not any(_ident(p) == _ident(op["player"]) for p in players):
+                    players.append(op["player"])
+            elif op["op"] == "update":         # e.g. its guild list changed
+                ident = _ident(op["player"])
+                for n, p in enumerate(players):
+                    if _ident(p) == ident:
+                        players[n] = op["player"]; break
+            elif op["op"] == "remove":
+                ident = _ident(op["player"])
+                for n, p in enumerate(players):
+                    if _ident(p) == ident:
+                        del players[n]; break
+        self._log_len = len(lines)
+        return players
+
+    # ── mutations ────────────────────────────────────────────────────────
+    def append(self, op: str, player: dict) -> None:
+        """Record one "add" / "update" / "remove"; flushed write-behind."""
+        self._ops.append({"op": op, "player": copy.deepcopy(player)})
+        self._schedule()
+
+    def rewrite(self) -> None:
+        """Persist the full snapshot on the next flush (batch changes)."""
+        self._rewrite = True
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._later())
+
+    async def _later(self) -> None:
+        await asyncio.sleep(self.delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            ops, self._ops = self._ops, []
+            full = self._rewrite or self._log_len + len(ops) >= self.compact_every
+            if not ops and not full:
+                return
+            self._rewrite = False
+            try:
+                if full:
+                    players = copy.deepcopy(list(self.snapshot()))
+                    await asyncio.to_thread(self._compact, players)
+                    self._log_len = 0
+                else:
+                    await asyncio.to_thread(_append, self.log_path, ops)
+                    self._log_len += len(ops)
+                self.writes += 1
+            except OSError:
+                log.exception("roster flush failed – will retry")
+                self._ops[:0] = ops
+                self._rewrite |= full
+                # we *are* the scheduled task – re-arm once it has finished
+                asyncio.get_running_loop().call_later(self.delay,
+                                                      self._schedule)
+
+    def _compact(self, players: list[dict]) -> None:
+        _atomic_write(self.path, players)
+        try:
+            os.remove(self.log_path)
+        except FileNotFoundError:
+            pass
+
+    async def close(self) -> None:
+        # a pending debounce is dropped; one mid-flush is waited for
+        if self._task is not None and not self._task.done() \
+                and not self._lock.locked():
+            self._task.cancel()
+        await self.flush()
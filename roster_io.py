@@ -0,0 +1,64 @@
+"""
+Roster import / export files for `/bf6 roster_import` and `roster_export`.
+• JSON: a list of {"name", "platform", "userId"?} – players.json itself
+  is valid input
+• CSV: a header row with name, platform and optionally userId
+• rows without a userId are resolved by name after import; invalid rows
+  are counted, not fatal
+"""
+
+from __future__ import annotations
+import csv, io, json, typing as t
+
+FIELDS      = ("name", "platform", "userId")
+MAX_BYTES   = 2 << 20                        # attachment size accepted
+MAX_ENTRIES = 10_000                         # rows per import
+
+
+def parse(data: bytes, filename: str,
+          platforms: t.Container[str]) -> tuple[list[dict], int]:
+    """(valid entries, rejected row count); ValueError if unreadable."""
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise ValueError("file is not UTF-8 text") from e
+    if filename.lower().endswith(".json") or text.lstrip().startswith("["):
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON ({e.msg}, line {e.lineno})") from e
+        if not isinstance(rows, list):
+            raise ValueError("JSON must be a list of players")
+    else:
+        rows = list(csv.DictReader(io.StringIO(text)))
+        if rows and "name" not in rows[0]:
+            raise ValueError("CSV needs a header row: name,platform,userId")
+    if len(rows) > MAX_ENTRIES:
+        raise ValueError(f"{len(rows):,} rows – at most {MAX_ENTRIES:,} "
+                         "per import")
+
+    out, bad = [], 0
+    for r in rows:
+        if not isinstance(r, dict):
+            bad += 1; continue
+        name     = str(r.get("name") or "").strip()
+        platform = str(r.get("platform") or "").strip().lower()
+        uid      = str(r.get("userId") or r.get("user_id") or "").strip()
+        if not name or platform not in platforms:
+            bad += 1; continue
+        p = {"name": name, "platform": platform}
+        if uid:
+            p["userId"] = uid
+        out.append(p)
+    return out, bad
+
+
+def dump(players: t.Iterable[dict], fmt: str) -> bytes:
+    rows = [{f: p[f] for f in FIELDS if f in p} for p in players]
+    if fmt == "json":
+        return json.dumps(rows, indent=2).encode()
+    buf = io.StringIO()
+    w = csv.DictWriter(buf, fieldnames=FIELDS, lineterminator="\n")
+    w.writeheader()
+    w.writerows(rows)
+    return buf.getvalue().encode()
@@ -0,0 +1,39 @@
+"""
+Cross-process sharing, for several bots on one host that point at the
+same BF6_DB – each with its own working directory and players.json.
+• the SQLite store doubles as an L2 cache: a profile another process
+  fetched within its TTL is read from disk instead of tracker.gg
+• a short lease per player decides which process fetches it; the others
+  poll the store for the result (see api_handler._from_shared)
+"""
+
+from __future__ import annotations
+import os, uuid
+from records import ProfileRecord
+from store import StatsStore
+
+LEASE_TTL = 15.0            # s a fetch lease is held
+
+
+class SQLiteShared:
+    def __init__(self, store: StatsStore, *, owner: str | None = None,
+                 lease_ttl: float = LEASE_TTL):
+        self.store     = store
+        self.owner     = owner or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_ttl = lease_ttl
+
+    async def lookup(self, kind: str, tag,
+                     since: float) -> tuple[ProfileRecord, float] | None:
+        if kind != "profile":                # only profiles are persisted
+            return None
+        row = await self.store.profile_since(tag, since)
+        if row is None:
+            return None
+        ts, data = row
+        return ProfileRecord.from_json(data), ts
+
+    async def lease(self, kind: str, tag) -> bool:
+        if kind != "profile":
+            return True
+        return await self.store.lease(f"{kind}:{tag[0]}/{tag[1]}",
+                                      self.owner, self.lease_ttl)
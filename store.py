@@ -0,0 +1,256 @@
+"""
+Local persistence for tracker.gg data (SQLite, WAL mode).
+• profiles – latest payload per player, replayed into the cache on start
+• matches  – one row per match id, the backing log for /bf6 recent
+• lookup_failures – negative cache for roster ID resolution
+• leases   – which process is fetching what, when several share the file
+• meta     – small named values (e.g. the last synced command-tree hash)
+• snapshots – per-player stat columns over time (packed float64 blobs,
+  written only when they change), thinned to hourly after 2 days and
+  daily after 30, dropped after a year
+Every query runs on a single worker thread; writes are fire-and-forget
+so the event loop never waits on disk.
+"""
+
+from __future__ import annotations
+import os, json, time, sqlite3, asyncio, hashlib, logging, typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger("bf6bot.store")
+
+Key = tuple[str, str]                        # (platform, userId)
+
+SNAPSHOT_EVERY = 600                         # s between snapshots per player
+DAY            = 86_400
+# (older than, keep one per bucket of) – anything past a year is dropped
+RETENTION      = ((2 * DAY, 3600), (30 * DAY, DAY))
+MAX_AGE        = 365 * DAY
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    platform   TEXT NOT NULL,
+    user_id    TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    data       TEXT NOT NULL,
+    PRIMARY KEY (platform, user_id)
+);
+CREATE TABLE IF NOT EXISTS matches (
+    platform   TEXT NOT NULL,
+    user_id    TEXT NOT NULL,
+    match_id   TEXT NOT NULL,
+    ts         TEXT,
+    data       TEXT NOT NULL,
+    PRIMARY KEY (platform, user_id, match_id)
+);
+CREATE INDEX IF NOT EXISTS matches_by_ts ON matches (platform, user_id, ts);
+CREATE TABLE IF NOT EXISTS snapshots (
+    platform   TEXT NOT NULL,
+    user_id    TEXT NOT NULL,
+    ts         INTEGER NOT NULL,
+    vals       BLOB NOT NULL,
+    PRIMARY KEY (platform, user_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS snapshots_by_ts ON snapshots (ts);
+CREATE TABLE IF NOT EXISTS leases (
+    name       TEXT PRIMARY KEY,
+    owner      TEXT NOT NULL,
+    until      REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name       TEXT PRIMARY KEY,
+    value      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS lookup_failures (
+    platform   TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    failed_at  REAL NOT NULL,
+    PRIMARY KEY (platform, name)
+);
+"""
+
+
+def match_id(m: dict) -> str:
+    """tracker.gg match id, falling back to the timestamp / content hash."""
+    return str((m.get("attributes") or {}).get("id")
+               or (m.get("metadata") or {}).get("timestamp")
+               or hashlib.sha1(json.dumps(m, sort_keys=True).encode())
+                         .hexdigest())
+
+
+class StatsStore:
+    def __init__(self, path: str | None = None):
+        self.path = path or os.getenv("BF6_DB", "bf6.sqlite3")
+        self._pool = ThreadPoolExecutor(max_workers=1,
+                                        thread_name_prefix="bf6-db")
+        self._db: sqlite3.Connection | None = None
+        self._last_snap: dict[Key, tuple[float, bytes]] = {}
+
+    # ── worker-thread side ───────────────────────────────────────────────
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=5000")   # other bot processes
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def _write(self, sql: str, rows: t.Iterable[tuple]) -> None:
+        try:
+            with self._conn() as db:
+                db.executemany(sql, rows)
+        except sqlite3.Error:
+            log.exception("store write failed")
+
+    def _read(self, sql: str, args: tuple = ()) -> list[tuple]:
+        return self._conn().execute(sql, args).fetchall()
+
+    # ── loop side ────────────────────────────────────────────────────────
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._pool, fn, *args)
+
+    def put_profile(self, key: Key, data: dict,
+                    fetched_at: float | None = None) -> None:
+        row = (*key, fetched_at or time.time(), json.dumps(data))
+        self._pool.submit(self._write,
+                          "INSERT OR REPLACE INTO profiles VALUES (?,?,?,?)",
+                          [row])
+
+    def put_matches(self, key: Key, matches: list[dict]) -> None:
+        rows = [(*key, match_id(m), (m.get("metadata") or {}).get("timestamp"),
+                 json.dumps(m)) for m in matches]
+        if rows:
+            self._pool.submit(self._write,
+                              "INSERT OR REPLACE INTO matches VALUES (?,?,?,?,?)",
+                              rows)
+
+    async def load_matches(self, key: Key, limit: int) -> list[dict]:
+        """Newest-first logged matches for one player."""
+        rows = await self._run(self._read,
+                               "SELECT data FROM matches WHERE platform=? "
+                               "AND user_id=? ORDER BY ts DESC LIMIT ?",
+                               (*key, limit))
+        return [json.loads(d) for d, in rows]
+
+    def drop_matches(self, key: Key) -> None:
+        self._pool.submit(self._write, "DELETE FROM matches WHERE platform=? "
+                          "AND user_id=?", [key])
+
+    def put_lookup_failures(self, keys: t.Iterable[tuple[str, str]]) -> None:
+        """keys: (platform, lower-cased name) pairs that found no player."""
+        now = time.time()
+        rows = [(p, n, now) for p, n in keys]
+        if rows:
+            self._pool.submit(self._write,
+                              "INSERT OR REPLACE INTO lookup_failures "
+                              "VALUES (?,?,?)", rows)
+
+    async def lookup_failures(self, max_age: float) -> set[tuple[str, str]]:
+        rows = await self._run(self._read,
+                               "SELECT platform, name FROM lookup_failures "
+                               "WHERE failed_at > ?", (time.time() - max_age,))
+        return set(rows)
+
+    def put_snapshot(self, key: Key, vals: bytes,
+                     now: float | None = None) -> None:
+        """Record stat columns unless unchanged or < SNAPSHOT_EVERY old."""
+        now = now or time.time()
+        last = self._last_snap.get(key)
+        if last and (last[1] == vals or now - last[0] < SNAPSHOT_EVERY):
+            return
+        self._last_snap[key] = (now, vals)
+        self._pool.submit(self._write,
+                          "INSERT OR REPLACE INTO snapshots VALUES (?,?,?,?)",
+                          [(*key, int(now), vals)])
+
+    async def window_baselines(self, since: float) -> dict[Key, bytes]:
+        """
+        Per player, the last snapshot at or before `since` – or, for
+        players first seen inside the window, their earliest one.
+        """
+        def q():
+            db = self._conn()
+            # SQLite returns the row holding MAX()/MIN() for bare columns
+            after = db.execute("SELECT platform, user_id, MIN(ts), vals "
+                               "FROM snapshots WHERE ts > ? "
+                               "GROUP BY platform, user_id", (since,))
+            before = db.execute("SELECT platform, user_id, MAX(ts), vals "
+                                "FROM snapshots WHERE ts <= ? "
+                                "GROUP BY platform, user_id", (since,))
+            out = {(p, u): v for p, u, _, v in after}
+            out.update({(p, u): v for p, u, _, v in before})
+            return out
+        return await self._run(q)
+
+    async def latest_snapshots(self) -> dict[Key, bytes]:
+        rows = await self._run(self._read,
+                               "SELECT platform, user_id, MAX(ts), vals "
+                               "FROM snapshots GROUP BY platform, user_id")
+        return {(p, u): v for p, u, _, v in rows}
+
+    async def downsample(self, now: float | None = None) -> int:
+        """Apply RETENTION / MAX_AGE; returns the number of rows dropped."""
+        now = now or time.time()
+        def q():
+            with self._conn() as db:
+                n = db.execute("DELETE FROM snapshots WHERE ts < ?",
+                               (now - MAX_AGE,)).rowcount
+                edges = [age for age, _ in RETENTION][1:] + [MAX_AGE]
+                for (age, bucket), older in zip(RETENTION, edges):
+                    lo, hi = now - older, now - age
+                    n += db.execute(
+                        "DELETE FROM snapshots WHERE ts >= ? AND ts < ? "
+                        "AND (platform, user_id, ts) NOT IN ("
+                        "  SELECT platform, user_id, MAX(ts) FROM snapshots"
+                        "  WHERE ts >= ? AND ts < ?"
+                        "  GROUP BY platform, user_id, ts / ?)",
+                        (lo, hi, lo, hi, bucket)).rowcount
+                return n
+        return await self._run(q)
+
+    async def profile_since(self, key: Key,
+                            since: float) -> tuple[float, dict] | None:
+        """(fetched_at, payload) if the stored profile is newer than `since`."""
+        rows = await self._run(self._read,
+                               "SELECT fetched_at, data FROM profiles WHERE "
+                               "platform=? AND user_id=? AND fetched_at > ?",
+                               (*key, since))
+        return (rows[0][0], json.loads(rows[0][1])) if rows else None
+
+    async def lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew `name` for `ttl` s unless another owner holds it."""
+        def q():
+            now = time.time()
+            with self._conn() as db:
+                return db.execute(
+                    "INSERT INTO leases VALUES (?,?,?) ON CONFLICT(name) DO "
+                    "UPDATE SET owner=excluded.owner, until=excluded.until "
+                    "WHERE leases.until < ? OR leases.owner = excluded.owner",
+                    (name, owner, now + ttl, now)).rowcount == 1
+        return await self._run(q)
+
+    async def get_meta(self, name: str) -> str | None:
+        rows = await self._run(self._read,
+                               "SELECT value FROM meta WHERE name=?", (name,))
+        return rows[0][0] if rows else None
+
+    def put_meta(self, name: str, value: str) -> None:
+        self._pool.submit(self._write,
+                          "INSERT OR REPLACE INTO meta VALUES (?,?)",
+                          [(name, value)])
+
+    async def load_profiles(self) -> list[tuple[Key, float, dict, int]]:
+        """[(key, fetched_at, payload, payload bytes)] for every snapshot."""
+        rows = await self._run(self._read,
+                               "SELECT platform, user_id, fetched_at, data "
+                               "FROM profiles")
+        return [((p, u), ts, json.loads(d), len(d)) for p, u, ts, d in rows]
+
+    async def close(self) -> None:
+        def _close():
+            if self._db is not None:
+                self._db.close(); self._db = None
+        await self._run(_close)
+        self._pool.shutdown(wait=True)
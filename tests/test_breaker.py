@@ -0,0 +1,67 @@
+"""Circuit breaker: a half-open probe must always be settled or replaced."""
+import os, sys, time, asyncio
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import api_handler
+
+
+def test_lost_probe_is_replaced_after_cooldown():
+    b = api_handler.CircuitBreaker(threshold=1, cooldown=60)
+    b.failure()
+    b.opened_at -= 61
+    assert b.allow() and b.state_ == "half-open"     # probe, never reports
+    assert not b.allow()
+    b.opened_at -= 61
+    assert b.allow()                                 # a new probe
+    b.success()
+    assert b.state_ == "closed"
+
+
+class StubTransport:
+    """Answers every GET with `body`; counts the calls."""
+    def __init__(self, body: bytes):
+        self.body, self.calls = body, 0
+
+    async def get(self, url, *, params=None, headers=None, timeout=15.0):
+        self.calls += 1
+        return api_handler.Response(200, {}, self.body)
+
+    solve = get
+
+    async def close(self) -> None:
+        pass
+
+
+def _fresh_state(monkeypatch, body: bytes) -> StubTransport:
+    tr = StubTransport(body)
+    monkeypatch.setattr(api_handler, "_transport", tr)
+    monkeypatch.setattr(api_handler, "_BREAKER", api_handler.CircuitBreaker())
+    monkeypatch.setattr(api_handler, "_backoff", lambda attempt: 0)
+    api_handler._CACHE.clear()
+    return tr
+
+
+def test_response_without_data_is_a_failed_attempt(monkeypatch):
+    tr = _fresh_state(monkeypatch, b'{"errors": []}')
+    url = api_handler.profile_url("steam", "nodata")
+    assert asyncio.run(api_handler._fetch(url)) is None
+    assert tr.calls == api_handler._ATTEMPTS
+    assert api_handler._BREAKER.failures == 1
+
+
+def test_expired_probe_hands_probing_on(monkeypatch):
+    tr = _fresh_state(monkeypatch, b'{"data": {"ok": 1}}')
+    b = api_handler._BREAKER
+    b.failures = b.threshold - 1
+    b.failure()
+    b.opened_at -= b.cooldown + 1
+    url = api_handler.profile_url("steam", "probe")
+
+    async def run():
+        # the probe's command has already timed out: it never reaches upstream
+        with api_handler.request_class(api_handler.INTERACTIVE,
+                                       time.monotonic() - 1):
+            assert await api_handler._fetch(url) is None
+        assert tr.calls == 0 and b.state_ == "half-open"
+        assert await api_handler._fetch(url, fresh=True) == {"ok": 1}
+    asyncio.run(run())
+    assert b.state() == dict(state="closed", failures=0, trips=1)
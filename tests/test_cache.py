@@ -0,0 +1,26 @@
+"""Response cache: reserved room keeps roster profiles from being evicted."""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import api_handler
+
+
+def test_reserved_entries_sit_on_top_of_the_budget():
+    c = api_handler.Cache(max_entries=2, max_bytes=1 << 20)
+    roster = ["p0", "p1", "p2"]
+    c.reserved = lambda: len(roster)
+    for k in roster:
+        c.put(k, k, ttl=60, size=10)
+    for k in ("m0", "m1", "m2"):                     # matches, searches…
+        c.put(k, k, ttl=60, size=10)
+    assert all(k in c for k in roster[1:]) and c.evictions == 1
+    assert len(c) == 5
+
+
+def test_reserved_bytes_grow_with_the_roster():
+    c = api_handler.Cache(max_entries=100, max_bytes=100)
+    c.reserved, c.reserved_each = (lambda: 2), 50
+    for k in ("a", "b", "c", "d"):
+        c.put(k, k, ttl=60, size=50)
+    assert len(c) == 4 and c.evictions == 0
+    c.put("e", "e", ttl=60, size=50)
+    assert "a" not in c and c.evictions == 1
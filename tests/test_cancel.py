@@ -0,0 +1,88 @@
+"""Shared work is cancelled once nobody waits for it any more."""
+import os, sys, asyncio, datetime as dt
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import api_handler
+from coalesce import Coalescer
+
+
+def test_last_waiter_leaving_cancels_the_computation():
+    async def run():
+        c, started = Coalescer(debounce=0), asyncio.Event()
+        async def compute():
+            started.set()
+            await asyncio.sleep(60)
+        a = c.join("k", compute)
+        b = c.join("k", compute)
+        assert a is b
+        await started.wait()
+        c.leave(a)
+        assert not a.done()
+        c.leave(a)
+        await asyncio.sleep(0)
+        assert a.cancelled() and len(c) == 0
+        # a newcomer starts afresh instead of joining the cancelled one
+        assert c.join("k", compute) is not a
+    asyncio.run(run())
+
+
+def test_result_leaves_even_when_its_token_has_expired():
+    async def run():
+        c = Coalescer(debounce=0)
+        task = c.join("k", lambda: asyncio.sleep(60))
+        old = dt.datetime.now(dt.timezone.utc) - dt.timedelta(hours=1)
+        assert await c.result(old, task) is None
+        await asyncio.sleep(0)
+        assert task.cancelled()
+    asyncio.run(run())
+
+
+class HeldTransport:
+    """Every GET blocks until `go` is set."""
+    def __init__(self):
+        self.go, self.urls = asyncio.Event(), []
+
+    async def get(self, url, *, params=None, headers=None, timeout=15.0):
+        self.urls.append(url)
+        await self.go.wait()
+        return api_handler.Response(200, {}, b'{"data": 1}')
+
+    solve = get
+
+    async def close(self) -> None:
+        pass
+
+
+def test_queued_fetch_is_dropped_when_its_caller_goes(monkeypatch):
+    monkeypatch.setattr(api_handler, "_SCHED", api_handler.Scheduler(1, reserve=0))
+    monkeypatch.setattr(api_handler, "_BREAKER", api_handler.CircuitBreaker())
+    api_handler._CACHE.clear()
+
+    async def run():
+        tr = HeldTransport()
+        monkeypatch.setattr(api_handler, "_transport", tr)
+        busy = asyncio.ensure_future(api_handler._fetch("u/busy"))
+        await asyncio.sleep(0.01)            # holds the only slot
+        queued = asyncio.ensure_future(api_handler._fetch("u/queued"))
+        await asyncio.sleep(0.01)
+        assert api_handler._SCHED.depth[api_handler.BACKGROUND] == 1
+        queued.cancel()
+        await asyncio.sleep(0.01)
+        assert "u/queued" not in api_handler._INFLIGHT
+        assert api_handler._SCHED.depth == [0, 0, 0]
+        tr.go.set()
+        assert await busy == 1
+        assert tr.urls == ["u/busy"]
+    asyncio.run(run())
+
+
+def test_cancelled_computation_does_not_unregister_its_successor():
+    async def run():
+        c = Coalescer(debounce=0)
+        a = c.join("k", lambda: asyncio.sleep(60))
+        c.leave(a)                           # cancelled, key freed at once
+        b = c.join("k", lambda: asyncio.sleep(60))
+        await asyncio.sleep(0)               # a's done callback runs
+        assert a.cancelled() and len(c) == 1
+        assert c.join("k", lambda: asyncio.sleep(60)) is b
+        c.leave(b); c.leave(b)
+    asyncio.run(run())
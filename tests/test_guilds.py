@@ -0,0 +1,25 @@
+"""Guild rosters: merging a duplicate entry keeps the player tracked."""
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from guilds import GuildRosters
+
+
+def test_merging_a_resolved_duplicate_keeps_the_key():
+    kept = {"name": "Foo", "platform": "steam", "userId": "123"}
+    dupe = {"name": "Foo", "platform": "steam"}           # name-only entry
+    r = GuildRosters([kept, dupe])
+    dupe["userId"] = "123"                   # as resolve_ids sets it first
+    r.merge(kept, dupe)
+    assert r.visible(None, ("steam", "123"))
+    assert r.search(None, "foo") == ["Foo"]
+
+
+def test_merging_folds_the_duplicates_guilds_in():
+    kept = {"name": "Foo", "platform": "steam", "userId": "1", "guilds": [1]}
+    dupe = {"name": "Foo", "platform": "steam", "guilds": [2]}
+    r = GuildRosters([kept, dupe])
+    dupe["userId"] = "1"
+    r.merge(kept, dupe)
+    assert kept["guilds"] == [1, 2]
+    assert r.visible(1, ("steam", "1")) and r.visible(2, ("steam", "1"))
+    assert not r.visible(3, ("steam", "1"))
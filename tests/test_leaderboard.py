@@ -0,0 +1,59 @@
+"""Per-scope leaderboards: a guild sees the global entries plus its own."""
+import os, sys, random
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from guilds import GuildRosters, scopes
+from leaderboard import LeaderboardIndex
+
+STATMAP = {"kd": ("kdRatio", "K/D")}
+
+
+def _setup(n=300, seed=1):
+    rng = random.Random(seed)
+    players = {}
+    for k in range(n):
+        p = {"name": f"p{k}", "platform": "steam", "userId": str(k)}
+        if rng.random() < .7:
+            p["guilds"] = rng.sample([1, 2, 3], rng.randint(1, 2))
+        players[("steam", str(k))] = p
+    rosters = GuildRosters(players.values())
+    board = LeaderboardIndex(STATMAP, lambda v, f: f"{v:.2f}",
+                             lambda key: scopes(players[key]))
+    rosters.on_change = board.rescope
+    for key, p in players.items():
+        board.update(key, p["name"], {"kd": rng.uniform(0, 5)})
+    return rng, players, rosters, board
+
+
+def _expected(board, rosters, guild, k=25):
+    view = rosters.view(guild)
+    rows = sorted((-v["kd"], board.names[key].lower(), key)
+                  for key, v in board.values.items()
+                  if view.keep is None or view.keep(key))
+    return [(board.names[key], -neg) for neg, _, key in rows[:k]]
+
+
+def test_guild_boards_match_a_filtered_scan():
+    rng, players, rosters, board = _setup()
+    for _ in range(200):                     # membership churn + refreshes
+        key = ("steam", str(rng.randrange(len(players))))
+        p, g = players[key], rng.choice([1, 2, 3])
+        op = rng.random()
+        if op < .3:
+            rosters.join(p, g)
+        elif op < .5 and "guilds" in p and len(p["guilds"]) > 1:
+            rosters.leave(p, g)
+        else:
+            board.update(key, p["name"], {"kd": rng.uniform(0, 5)})
+        for guild in (None, 1, 2, 3):
+            scope = rosters.view(guild).scope
+            assert board.top("kd", 25, scope) == _expected(board, rosters, guild)
+
+
+def test_description_cache_follows_only_its_own_rankings():
+    _, players, rosters, board = _setup()
+    d1 = board.description("kd", scope=1)
+    only2 = next(k for k, p in players.items() if p.get("guilds") == [2])
+    board.update(only2, players[only2]["name"], {"kd": 99})
+    assert board.description("kd", scope=1) is d1      # guild 1 untouched
+    assert board.description("kd", scope=2).startswith("🥇 **" +
+                                                       players[only2]["name"])
@@ -0,0 +1,71 @@
+"""Match log: compact in-memory records, bounded per player count."""
+import os, sys, asyncio
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import matchlog
+from records import MatchRecord
+
+
+def _match(n: int) -> dict:
+    stats = {"kills": {"value": 10 + n}, "deaths": {"value": 5},
+             "kdRatio": {"value": (10 + n) / 5}}
+    return {"attributes": {"id": f"m{n}"},
+            "metadata": {"timestamp": f"2026-01-{n + 1:02d}T00:00:00Z"},
+            "segments": [{"stats": stats}]}
+
+
+class MemStore:
+    def __init__(self):
+        self.rows: dict = {}
+
+    async def load_matches(self, key, limit):
+        return self.rows.get(key, [])[:limit]
+
+    def put_matches(self, key, ms):
+        self.rows[key] = ms + self.rows.get(key, [])
+
+    def drop_matches(self, key):
+        self.rows.pop(key, None)
+
+
+class SlowClient:
+    """TrnClient stand-in whose page only arrives when `go` is set."""
+    go: asyncio.Event
+
+    async def __aenter__(self): return self
+    async def __aexit__(self, *_): return False
+
+    async def recent_matches(self, platform, uid, limit, page):
+        await SlowClient.go.wait()
+        return [_match(n) for n in range(3)] if page == 1 else []
+
+
+def test_records_and_lru(monkeypatch):
+    monkeypatch.setattr(matchlog, "TrnClient", SlowClient)
+
+    async def run():
+        SlowClient.go = asyncio.Event(); SlowClient.go.set()
+        log = matchlog.MatchLog(MemStore(), max_players=2)
+        for uid in "abc":
+            ms = await log.recent(("steam", uid), 2)
+        assert all(isinstance(m, MatchRecord) for m in ms)
+        assert [m.id for m in ms] == ["m2", "m1"]
+        assert ms[0].kills == 12 and ms[0].kd == 2.4
+        assert len(log) == 2 and ("steam", "a") not in log._log
+        assert log.aggregate(("steam", "c"))["matches"] == 3
+    asyncio.run(run())
+
+
+def test_forget_during_sync(monkeypatch):
+    monkeypatch.setattr(matchlog, "TrnClient", SlowClient)
+
+    async def run():
+        SlowClient.go = asyncio.Event()
+        store = MemStore()
+        log = matchlog.MatchLog(store)
+        waiter = asyncio.ensure_future(log.recent(("steam", "x"), 5))
+        await asyncio.sleep(0.01)
+        log.forget(("steam", "x"))
+        SlowClient.go.set()
+        assert await waiter == []
+        assert ("steam", "x") not in store.rows
+    asyncio.run(run())